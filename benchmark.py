@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+项目生成器的基准测试。
+
+按阶段测量 ProjectCreator 的耗时（阶段是累加的）：
+
+- render: 只渲染文件内容
+- write:  渲染 + 写文件
+- git:    渲染 + 写文件 + Git初始化
+- venv:   渲染 + 写文件 + Git初始化 + 创建虚拟环境
+- create: 完整的 ProjectCreator.create()（按步骤依赖并发执行）
+
+每个阶段覆盖不同的功能组合（日志系统、配置系统及各配置格式）和项目数量，
+所有项目都生成在临时目录中，不需要网络。缓存目录（虚拟环境模板、解释器探测结果、
+编译后的模板）也指向临时目录，不会写入 ~/.cache；venv 阶段预热时会先生成模板。
+
+默认与仓库中的 benchmark_baseline.json 比较，任一项耗时增长超过阈值则以非零退出码结束。
+基准结果与机器有关，在其他机器上比较前先用 --output 重新生成。
+
+用法：
+    python benchmark.py
+    python benchmark.py --output benchmark_baseline.json --no-baseline
+    python benchmark.py --baseline other.json --threshold 0.3
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import atexit
+from datetime import datetime
+
+# main 在导入时确定缓存目录，因此在导入之前把 XDG_CACHE_HOME 指向临时目录
+CACHE_HOME = tempfile.mkdtemp(prefix='project_creater_bench_cache_')
+os.environ['XDG_CACHE_HOME'] = CACHE_HOME
+atexit.register(shutil.rmtree, CACHE_HOME, ignore_errors=True)
+
+from main import ProjectInfo, ProjectCreator  # noqa: E402
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'benchmark_baseline.json')
+
+PHASES = ('render', 'write', 'git', 'venv', 'create')
+COUNTS = (1, 10, 100)
+
+
+def feature_combinations():
+    """所有功能组合：(名称, ProjectInfo 字段)"""
+    combinations = []
+    for use_logging in (False, True):
+        formats = [None] + list(ProjectInfo.CONFIG_FORMATS)
+        for config_format in formats:
+            fields = {
+                'use_logging': use_logging,
+                'use_config': config_format is not None,
+                'config_format': config_format or 'yaml',
+            }
+            name = '+'.join(['logging'] if use_logging else []) or 'basic'
+            if config_format:
+                name += f'+config-{config_format}'
+            combinations.append((name, fields))
+    return combinations
+
+
+def make_creator(root, index, phase, fields):
+    """创建一个静默的 ProjectCreator"""
+    info = ProjectInfo.from_dict(dict(
+        fields,
+        project_name=f'bench_{index}',
+        project_path=root,
+        author='bench',
+        email='bench@example.com',
+        description='benchmark project',
+        use_git=phase in ('git', 'venv', 'create'),
+        use_venv=phase in ('venv', 'create'),
+        venv_python=sys.executable,
+    ))
+    return ProjectCreator(info, quiet=True)
+
+
+def run_phase(creator, phase):
+    """执行到指定阶段为止的所有步骤"""
+    if phase == 'create':
+        creator.create()
+        return
+    creator.render()
+    if phase == 'render':
+        return
+    creator.write()
+    if phase == 'write':
+        return
+    creator.init_git()
+    creator.commit_git()
+    if phase == 'git':
+        return
+    creator.create_venv()
+
+
+def measure(phase, fields, count, repeat):
+    """生成 count 个项目，返回多次重复中最短的耗时（秒）"""
+    best = None
+    for _ in range(repeat):
+        root = tempfile.mkdtemp(prefix='project_creater_bench_')
+        try:
+            creators = [make_creator(root, i, phase, fields) for i in range(count)]
+            start = time.perf_counter()
+            for creator in creators:
+                run_phase(creator, phase)
+            elapsed = time.perf_counter() - start
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        for creator in creators:
+            if creator.warnings:
+                raise RuntimeError(f"{phase} 阶段出现警告：{creator.warnings[0]}")
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_benchmarks(phases, counts, repeat):
+    """运行全部基准测试，返回结果字典"""
+    # Git需要作者信息；使用固定值，结果不依赖本机配置
+    for var, value in (('GIT_AUTHOR_NAME', 'bench'), ('GIT_AUTHOR_EMAIL', 'bench@example.com'),
+                       ('GIT_COMMITTER_NAME', 'bench'), ('GIT_COMMITTER_EMAIL', 'bench@example.com')):
+        os.environ.setdefault(var, value)
+
+    results = []
+    for phase in phases:
+        for name, fields in feature_combinations():
+            # 预热：导入依赖、生成虚拟环境模板等
+            measure(phase, fields, 1, 1)
+            for count in counts:
+                seconds = measure(phase, fields, count, repeat)
+                results.append({
+                    'phase': phase,
+                    'features': name,
+                    'count': count,
+                    'seconds': seconds,
+                    'projects_per_second': count / seconds if seconds else 0.0,
+                })
+                print(f"{phase:<8}{name:<28}{count:>5} 个项目 {seconds * 1000:>10.1f} ms "
+                      f"{count / seconds if seconds else 0:>10.1f} 个/秒")
+
+    return {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """与基准结果比较，返回退步的条目说明"""
+    def key(result):
+        return (result['phase'], result['features'], result['count'])
+
+    baseline_results = {key(r): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        base = baseline_results.get(key(result))
+        if not base or not base['seconds']:
+            continue
+        ratio = result['seconds'] / base['seconds']
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{result['phase']} {result['features']} x{result['count']}: "
+                f"{base['seconds'] * 1000:.1f} ms -> {result['seconds'] * 1000:.1f} ms "
+                f"(+{(ratio - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='项目生成器基准测试')
+    parser.add_argument('--phases', nargs='+', choices=PHASES, default=list(PHASES),
+                        help='要测量的阶段')
+    parser.add_argument('--counts', nargs='+', type=int, default=list(COUNTS),
+                        help='每次生成的项目数量')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数，取最短耗时')
+    parser.add_argument('--output', default='bench_results.json', help='结果JSON文件')
+    parser.add_argument('--baseline', default=BASELINE_FILE,
+                        help='用于比较的基准结果JSON文件（默认为 benchmark_baseline.json）')
+    parser.add_argument('--no-baseline', dest='baseline', action='store_const', const=None,
+                        help='不与基准结果比较')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='允许的退步比例，超过则返回非零退出码（默认0.2即20%%）')
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.phases, args.counts, args.repeat)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能退步（阈值 {args.threshold:.0%}）：")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\n与基准相比没有超过 {args.threshold:.0%} 的退步")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,8 +7,887 @@ from pathlib import Path
 import re
 import glob
 import json
+import io
+import posixpath
+import stat
+import errno
+import csv
+import time
+import threading
+import functools
+import inspect
+from contextlib import contextmanager
+import hashlib
+import shutil
+import tempfile
+import string
+import zipfile
+import tarfile
+import configparser
+import socket
+import socketserver
+import signal
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    from importlib.resources import files as resource_files
+except ImportError:  # Python < 3.9
+    resource_files = None
+
+# 本工具的缓存目录（解释器探测结果等）
+CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'project_creater'
+)
+PYTHON_CACHE_FILE = os.path.join(CACHE_DIR, 'pythons.json')
+VENV_CACHE_DIR = os.path.join(CACHE_DIR, 'venvs')
+WHEEL_CACHE_DIR = os.path.join(CACHE_DIR, 'wheels')
+TEMPLATE_CACHE_DIR = os.path.join(CACHE_DIR, 'templates')
+
+# 用户模板目录（多个用 os.pathsep 分隔），其中的同名模板优先于内置模板
+TEMPLATE_PATH_ENV = 'PROJECT_CREATER_TEMPLATES'
+
+# 生成的项目中记录生成参数和文件哈希的清单，用于增量更新
+MANIFEST_FILE = '.project_creater.json'
+
+# Linux 下用于 reflink（写时复制）克隆文件的 ioctl 编号
+FICLONE = 0x40049409
+
+
+class Tracer:
+    """记录各阶段的耗时区间，输出 Chrome trace-event JSON 和文本汇总"""
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def span(self, name, cat='method', **args):
+        """记录一个耗时区间，区间内可用 add_args() 附加信息"""
+        if not self.enabled:
+            yield
+            return
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(args)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            event = {
+                'name': name,
+                'cat': cat,
+                'ph': 'X',
+                'ts': start * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': args,
+            }
+            with self._lock:
+                self.events.append(event)
+
+    def add_args(self, **args):
+        """为当前线程最内层的区间附加信息（如写入的字节数、文件数）"""
+        stack = getattr(self._local, 'stack', None)
+        if self.enabled and stack:
+            stack[-1].update(args)
+
+    def save(self, path):
+        """写出 Chrome trace-event JSON（可在 chrome://tracing 或 Perfetto 中打开）"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+    def summary(self):
+        """按区间名称汇总的文本表格"""
+        rows = {}
+        for event in self.events:
+            row = rows.setdefault(event['name'], [0, 0.0, 0.0, 0, 0])
+            row[0] += 1
+            row[1] += event['dur'] / 1000
+            row[2] = max(row[2], event['dur'] / 1000)
+            row[3] += event['args'].get('files', 0)
+            row[4] += event['args'].get('bytes', 0)
+
+        width = max([len(name) for name in rows] + [4])
+        lines = [f"{'名称':<{width - 2}} {'次数':>4} {'总耗时(ms)':>10} {'最长(ms)':>10} "
+                 f"{'文件数':>6} {'字节数':>10}"]
+        for name, (count, total, longest, files, size) in sorted(
+                rows.items(), key=lambda item: item[1][1], reverse=True):
+            lines.append(f"{name:<{width}} {count:>6} {total:>14.1f} {longest:>12.1f} "
+                         f"{files:>9} {size:>13}")
+        return '\n'.join(lines)
+
+
+TRACER = Tracer()
+
+
+def traced(cls):
+    """类装饰器：为类的每个方法记录耗时区间"""
+    for name, attr in list(vars(cls).items()):
+        if name.startswith('__'):
+            continue
+        wrap_classmethod = isinstance(attr, classmethod)
+        func = attr.__func__ if wrap_classmethod else attr
+        if not inspect.isfunction(func):
+            continue
+
+        def make_wrapper(func, span_name):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not TRACER.enabled:
+                    return func(*args, **kwargs)
+                with TRACER.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+
+        wrapper = make_wrapper(func, f"{cls.__name__}.{name}")
+        setattr(cls, name, classmethod(wrapper) if wrap_classmethod else wrapper)
+    return cls
+
+
+def run_subprocess(args, **kwargs):
+    """subprocess.run 的包装，启用跟踪时记录子进程耗时"""
+    if not TRACER.enabled:
+        return subprocess.run(args, **kwargs)
+    program = os.path.basename(str(args[0]))
+    name = ' '.join([program] + [str(arg) for arg in args[1:3]])
+    with TRACER.span(name, cat='subprocess', cmd=[str(arg) for arg in args]):
+        return subprocess.run(args, **kwargs)
+
+
+def _load_python_cache():
+    """读取解释器版本缓存"""
+    try:
+        with open(PYTHON_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_python_cache(cache):
+    """原子地写入解释器版本缓存"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_file = f"{PYTHON_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, PYTHON_CACHE_FILE)
+    except OSError:
+        pass
+
+
+def _to_bool(value):
+    """把清单中的 y/n、true/false、1/0 等写法转换为布尔值"""
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ('y', 'yes', 'true', '1', 'on'):
+        return True
+    if text in ('n', 'no', 'false', '0', 'off', ''):
+        return False
+    raise ValueError(f"无法识别的布尔值：{value!r}")
+
+
+def _toml_value(value):
+    """TOML 的标量值和数组；字符串的 JSON 写法也是合法的 TOML 基本字符串"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(_toml_value(v) for v in value) + ']'
+    return json.dumps(str(value), ensure_ascii=False)
+
+
+def _toml_dumps(data, table=''):
+    """把嵌套字典写成 TOML：先写本表的键值，再按 [a.b] 写子表（标准库只能读不能写 TOML）"""
+    lines = [f'{key} = {_toml_value(value)}' for key, value in data.items()
+             if not isinstance(value, dict)]
+    text = '\n'.join(lines) + '\n' if lines else ''
+    for key, value in data.items():
+        if isinstance(value, dict):
+            name = f'{table}.{key}' if table else key
+            text += f'\n[{name}]\n' + _toml_dumps(value, name)
+    return text
+
+
+def _stat_key(st):
+    """由文件状态生成缓存键，解释器被替换或升级时键会变化"""
+    return [st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size]
+
+
+def _probe_python(path):
+    """执行 `python --version` 获取版本号，失败时返回None"""
+    try:
+        result = run_subprocess([path, '--version'],
+                                capture_output=True,
+                                text=True,
+                                timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    # Python 3.4 之前的版本把版本号输出到 stderr
+    return (result.stdout or result.stderr).strip() or None
+
+
+# 进程内的解释器版本缓存，常驻进程（serve）中不必每次读取磁盘缓存
+_PYTHON_VERSIONS = {}
+
+
+def _python_version(python):
+    """获取解释器版本，优先使用解释器探测缓存"""
+    real_path = os.path.realpath(python)
+    key = _stat_key(os.stat(real_path))
+    entry = _PYTHON_VERSIONS.get(real_path)
+    if entry and entry['key'] == key:
+        return entry['version']
+    cache = _load_python_cache()
+    entry = cache.get(real_path)
+    if not entry or entry.get('key') != key:
+        entry = {'key': key, 'version': _probe_python(real_path)}
+        cache[real_path] = entry
+        _save_python_cache(cache)
+    _PYTHON_VERSIONS[real_path] = entry
+    return entry['version']
+
+
+def run_steps(steps, max_workers=None):
+    """按依赖关系并发执行步骤，每个步骤在其依赖全部完成后立即开始
+
+    Args:
+        steps: [(步骤名称, 无参可调用对象, 依赖的步骤名称列表)]
+        max_workers: 最大并发数，默认每个步骤一个线程
+
+    Returns:
+        dict: 步骤名称 -> (开始时间, 结束时间)，时间来自 time.perf_counter()
+
+    Raises:
+        第一个失败步骤抛出的异常；依赖失败步骤的步骤不会执行
+    """
+    pending = {name: (func, set(deps)) for name, func, deps in steps}
+    timings = {}
+    done = set()
+    error = None
+
+    def run(name, func):
+        start = time.perf_counter()
+        try:
+            func()
+        finally:
+            timings[name] = (start, time.perf_counter())
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(len(steps), 1)) as pool:
+        running = {}
+        while pending or running:
+            if error is None:
+                for name, (func, deps) in list(pending.items()):
+                    if deps <= done:
+                        running[pool.submit(run, name, func)] = name
+                        del pending[name]
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                if future.exception() is not None:
+                    error = error or future.exception()
+                else:
+                    done.add(name)
+
+    if error is not None:
+        raise error
+    if pending:
+        raise RuntimeError(f"步骤依赖无法满足：{', '.join(sorted(pending))}")
+    return timings
+
+
+def critical_path(steps, timings):
+    """计算关键路径（耗时最长的依赖链）
+
+    Returns:
+        tuple: (关键路径总耗时（秒）, 关键路径上的步骤名称列表)
+    """
+    deps = {name: step_deps for name, _, step_deps in steps}
+    longest = {}
+
+    def visit(name):
+        if name not in longest:
+            start, end = timings[name]
+            best = max((visit(dep) + (dep,) for dep in deps[name]),
+                       key=lambda item: item[0], default=(0.0,))
+            longest[name] = (best[0] + end - start,) + best[1:]
+        return longest[name]
+
+    total, *path = max((visit(name) + (name,) for name in timings), key=lambda item: item[0])
+    return total, path
+
 
+@traced
+class VenvCache:
+    """模板虚拟环境缓存
+
+    每个解释器（按真实路径和版本区分）只运行一次 `python -m venv`，
+    之后的虚拟环境都从模板克隆：文件优先用 reflink，其次用硬链接，
+    最后才复制；含有虚拟环境绝对路径的少量文件（pyvenv.cfg、
+    bin 下的激活脚本和 pip 启动脚本）会被重写为新路径。
+    """
+
+    # 可能包含虚拟环境绝对路径的目录
+    SCRIPT_DIRS = ('bin', 'Scripts')
+
+    def __init__(self, cache_dir=VENV_CACHE_DIR, output=None):
+        self.cache_dir = cache_dir
+        self.output = output
+        self._use_reflink = fcntl is not None
+        self._use_hardlink = True
+
+    def template(self, python):
+        """返回解释器对应的模板虚拟环境，缓存中没有时先创建"""
+        real_path = os.path.realpath(python)
+        version = _python_version(real_path)
+        if not version:
+            raise RuntimeError(f"无法获取解释器版本：{python}")
+
+        digest = hashlib.sha1(f"{real_path}\0{version}".encode('utf-8')).hexdigest()[:16]
+        template_root = os.path.join(self.cache_dir, digest)
+        template = os.path.join(template_root, '.venv')
+        if os.path.exists(os.path.join(template, 'pyvenv.cfg')):
+            return template
+
+        # 先在临时目录中创建，再整体改名，避免并发创建时看到半成品
+        os.makedirs(self.cache_dir, exist_ok=True)
+        build_root = tempfile.mkdtemp(prefix=f'.{digest}.', dir=self.cache_dir)
+        try:
+            build_venv = os.path.join(build_root, '.venv')
+            run_subprocess([python, '-m', 'venv', build_venv], check=True,
+                           stdout=self.output, stderr=self.output)
+            self.relocate(build_venv, build_venv, template)
+            try:
+                os.rename(build_root, template_root)
+            except OSError:
+                # 其他进程已经创建了同一个模板
+                if not os.path.exists(os.path.join(template, 'pyvenv.cfg')):
+                    raise
+        finally:
+            shutil.rmtree(build_root, ignore_errors=True)
+        return template
+
+    def clone(self, python, venv_path):
+        """从模板克隆虚拟环境到 venv_path"""
+        template = self.template(python)
+        old_prefix = os.fsencode(template)
+        new_prefix = os.fsencode(os.path.abspath(venv_path))
+
+        cloned = 0
+        for root, dirs, files in os.walk(template):
+            rel_root = os.path.relpath(root, template)
+            target_root = os.path.normpath(os.path.join(venv_path, rel_root))
+            os.makedirs(target_root, exist_ok=True)
+            rewrite = rel_root in self.SCRIPT_DIRS
+
+            # os.walk 不会进入指向目录的符号链接，这里按链接本身复制
+            for name in [d for d in dirs if os.path.islink(os.path.join(root, d))] + files:
+                src = os.path.join(root, name)
+                dst = os.path.join(target_root, name)
+                if os.path.islink(src):
+                    link = os.fsencode(os.readlink(src)).replace(old_prefix, new_prefix)
+                    os.symlink(os.fsdecode(link), dst)
+                elif rewrite or (rel_root == '.' and name == 'pyvenv.cfg'):
+                    self._copy_rewritten(src, dst, old_prefix, new_prefix)
+                else:
+                    self._clone_file(src, dst)
+                cloned += 1
+        TRACER.add_args(files=cloned)
+
+    def relocate(self, venv_path, old_path, new_path):
+        """把虚拟环境中记录的绝对路径从 old_path 改为 new_path（原地修改）"""
+        old_prefix = os.fsencode(os.path.abspath(old_path))
+        new_prefix = os.fsencode(os.path.abspath(new_path))
+        paths = [os.path.join(venv_path, 'pyvenv.cfg')]
+        for script_dir in self.SCRIPT_DIRS:
+            script_dir = os.path.join(venv_path, script_dir)
+            if os.path.isdir(script_dir):
+                paths.extend(os.path.join(script_dir, name) for name in os.listdir(script_dir))
+        for path in paths:
+            if os.path.isfile(path) and not os.path.islink(path):
+                tmp_path = f"{path}.relocate"
+                self._copy_rewritten(path, tmp_path, old_prefix, new_prefix)
+                os.replace(tmp_path, path)
+
+    def _copy_rewritten(self, src, dst, old_prefix, new_prefix):
+        """复制文件并替换其中的路径，保留文件权限"""
+        with open(src, 'rb') as f:
+            content = f.read()
+        with open(dst, 'wb') as f:
+            f.write(content.replace(old_prefix, new_prefix))
+        shutil.copymode(src, dst)
+
+    def _clone_file(self, src, dst):
+        """依次尝试 reflink、硬链接和复制"""
+        if self._use_reflink:
+            try:
+                with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                    fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                shutil.copymode(src, dst)
+                return
+            except OSError:
+                # 文件系统不支持 reflink，后续文件不再尝试
+                self._use_reflink = False
+                os.unlink(dst)
+        if self._use_hardlink:
+            try:
+                os.link(src, dst)
+                return
+            except OSError:
+                self._use_hardlink = False
+        shutil.copy2(src, dst)
+
+
+@traced
+class Wheelhouse:
+    """从本地 wheel 目录离线安装依赖
+
+    依赖解析只做一次：结果按 wheel 目录内容、依赖列表和解释器缓存在磁盘上，
+    同一次批量运行中的所有项目共用。每个 wheel 只解压一次到共享缓存，
+    安装时把缓存中的文件硬链接到虚拟环境的 site-packages，而不是重新解压。
+    """
+
+    # 可以直接链接安装的 .data 子目录
+    LIB_SCHEMES = ('purelib', 'platlib')
+
+    def __init__(self, path, cache_dir=WHEEL_CACHE_DIR, output=None):
+        self.path = os.path.abspath(path)
+        self.cache_dir = cache_dir
+        self.output = output
+        self._resolved = {}
+
+    def resolve(self, python, requirements):
+        """解析依赖，返回需要安装的 [(wheel路径, 是否直接依赖)]"""
+        listing = sorted(
+            (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+            for entry in os.scandir(self.path) if entry.is_file()
+        )
+        real_python = os.path.realpath(python)
+        key_source = json.dumps([self.path, listing, sorted(requirements),
+                                 real_python, _python_version(real_python)])
+        key = hashlib.sha1(key_source.encode('utf-8')).hexdigest()
+        if key in self._resolved:
+            return self._resolved[key]
+
+        cache_file = os.path.join(self.cache_dir, 'resolved', f'{key}.json')
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                resolved = [tuple(item) for item in json.load(f)]
+        except (OSError, ValueError):
+            resolved = self._pip_resolve(python, requirements)
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(resolved, f)
+            os.replace(tmp_file, cache_file)
+
+        self._resolved[key] = resolved
+        return resolved
+
+    def _pip_resolve(self, python, requirements):
+        """使用 pip 的 --dry-run --report 离线解析依赖（需要 pip>=22.2）"""
+        fd, report_file = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            run_subprocess([python, '-m', 'pip', 'install', '--dry-run', '--ignore-installed',
+                            '--no-index', '--find-links', self.path,
+                            '--report', report_file, '--quiet'] + list(requirements),
+                           check=True, stdout=self.output, stderr=self.output)
+            with open(report_file, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        finally:
+            os.unlink(report_file)
+
+        resolved = []
+        for item in report['install']:
+            wheel = url2pathname(urlparse(item['download_info']['url']).path)
+            if not wheel.endswith('.whl'):
+                raise RuntimeError(f"依赖不是 wheel 格式，无法离线链接安装：{wheel}")
+            resolved.append((wheel, bool(item.get('requested'))))
+        return resolved
+
+    def unpacked(self, wheel):
+        """返回 wheel 在共享缓存中的解压目录，必要时先解压
+
+        缓存目录名包含 wheel 的大小和修改时间，同名重新构建的 wheel 不会用到旧的解压结果。
+        """
+        st = os.stat(wheel)
+        target = os.path.join(self.cache_dir, 'unpacked',
+                              f'{os.path.basename(wheel)}-{st.st_size}-{st.st_mtime_ns}')
+        if os.path.isdir(target):
+            return target
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix='.unpack.', dir=os.path.dirname(target))
+        try:
+            with zipfile.ZipFile(wheel) as archive:
+                archive.extractall(tmp_dir)
+            try:
+                os.rename(tmp_dir, target)
+            except OSError:
+                # 其他进程已经解压了同一个 wheel
+                if not os.path.isdir(target):
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return target
+
+    def install(self, venv_path, requirements):
+        """把依赖安装到虚拟环境中"""
+        python = os.path.join(venv_path, 'bin', 'python')
+        site_packages = glob.glob(os.path.join(venv_path, 'lib', 'python*', 'site-packages'))
+        if len(site_packages) != 1:
+            raise RuntimeError(f"无法确定虚拟环境的 site-packages：{venv_path}")
+
+        # 先检查所有 wheel 都能链接安装，避免装了一半再退回 pip
+        wheels = [(self.unpacked(wheel), requested)
+                  for wheel, requested in self.resolve(python, requirements)]
+        for unpacked, _ in wheels:
+            self._check_linkable(unpacked)
+        for unpacked, requested in wheels:
+            self._link_wheel(unpacked, venv_path, site_packages[0], requested)
+
+    def _check_linkable(self, unpacked):
+        """wheel 中有 scripts、headers 等无法直接链接的 .data 子目录时抛出 RuntimeError"""
+        for name in os.listdir(unpacked):
+            if name.endswith('.data'):
+                for scheme in os.listdir(os.path.join(unpacked, name)):
+                    if scheme not in self.LIB_SCHEMES:
+                        raise RuntimeError(f"暂不支持链接安装 {name}/{scheme}")
+
+    def _link_wheel(self, unpacked, venv_path, site_packages, requested):
+        """把解压后的 wheel 链接进 site-packages，并生成命令行脚本"""
+        dist_info = None
+        for name in os.listdir(unpacked):
+            src = os.path.join(unpacked, name)
+            if name.endswith('.dist-info'):
+                dist_info = name
+            elif name.endswith('.data'):
+                for scheme in os.listdir(src):
+                    self._link_tree(os.path.join(src, scheme), site_packages)
+                continue
+            self._link_tree(src, os.path.join(site_packages, name))
+
+        # RECORD 需要追加脚本，不能与缓存共享
+        record_file = os.path.join(site_packages, dist_info, 'RECORD')
+        os.unlink(record_file)
+        shutil.copyfile(os.path.join(unpacked, dist_info, 'RECORD'), record_file)
+        with open(record_file, 'a', encoding='utf-8') as record:
+            for script in self._write_scripts(os.path.join(unpacked, dist_info), venv_path):
+                record.write(f"{os.path.relpath(script, site_packages)},,\n")
+            for marker, content in (('INSTALLER', 'project_creater\n'),
+                                    ('REQUESTED', '' if requested else None)):
+                if content is None:
+                    continue
+                marker_file = os.path.join(site_packages, dist_info, marker)
+                with open(marker_file, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                record.write(f"{dist_info}/{marker},,\n")
+
+    def _link_tree(self, src, dst):
+        """硬链接文件或目录树，跨设备等无法硬链接时退回到复制
+
+        目标已存在时（如 resume，或与从虚拟环境模板硬链接来的文件重叠）不能直接写入它：
+        它可能与解压缓存或虚拟环境模板共享 inode。此时先链接或复制到临时文件，再 os.replace。
+        """
+        if os.path.isfile(src):
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            try:
+                os.link(src, dst)
+                return
+            except FileExistsError:
+                pass
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                    raise
+            tmp = f'{dst}.{os.getpid()}.tmp'
+            if os.path.lexists(tmp):
+                os.unlink(tmp)
+            try:
+                os.link(src, tmp)
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                    raise
+                shutil.copy2(src, tmp)
+            os.replace(tmp, dst)
+            return
+        for root, _, files in os.walk(src):
+            target_root = os.path.normpath(os.path.join(dst, os.path.relpath(root, src)))
+            os.makedirs(target_root, exist_ok=True)
+            for name in files:
+                self._link_tree(os.path.join(root, name), os.path.join(target_root, name))
+
+    def _write_scripts(self, dist_info, venv_path):
+        """根据 entry_points.txt 生成 console_scripts / gui_scripts"""
+        parser = configparser.ConfigParser(delimiters=('=',), interpolation=None)
+        parser.optionxform = str
+        parser.read(os.path.join(dist_info, 'entry_points.txt'), encoding='utf-8')
+
+        scripts = []
+        python = os.path.join(os.path.abspath(venv_path), 'bin', 'python')
+        for section in ('console_scripts', 'gui_scripts'):
+            if not parser.has_section(section):
+                continue
+            for name, target in parser.items(section):
+                module, _, attr = target.partition(':')
+                attr = attr.split('[')[0].strip()
+                script = os.path.join(venv_path, 'bin', name)
+                with open(script, 'w', encoding='utf-8') as f:
+                    f.write(f"#!{python}\n"
+                            "import re\n"
+                            "import sys\n"
+                            f"from {module.strip()} import {attr.split('.')[0]}\n"
+                            "if __name__ == '__main__':\n"
+                            "    sys.argv[0] = re.sub(r'(-script\\.pyw|\\.exe)?$', '', sys.argv[0])\n"
+                            f"    sys.exit({attr}())\n")
+                os.chmod(script, 0o755)
+                scripts.append(script)
+        return scripts
+
+
+@traced
+class ArchiveWriter:
+    """把渲染结果直接写入 tar.gz/tar/zip 归档，不经过文件系统
+
+    tar 以流模式写出，可以直接写到标准输出；多个项目可以写入同一个归档。
+    """
+
+    DIR_MODE = 0o755
+    FILE_MODE = 0o644
+
+    def __init__(self, path, archive_format=None):
+        self.path = path
+        self.format = archive_format or self.guess_format(path)
+        self.mtime = time.time()
+        self._fileobj = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        if self.format == 'zip':
+            self._archive = zipfile.ZipFile(self._fileobj, 'w', zipfile.ZIP_DEFLATED)
+        else:
+            mode = 'w|gz' if self.format == 'tar.gz' else 'w|'
+            self._archive = tarfile.open(fileobj=self._fileobj, mode=mode)
+
+    @staticmethod
+    def guess_format(path):
+        """根据扩展名判断归档格式，标准输出默认为 tar.gz"""
+        if path.endswith('.zip'):
+            return 'zip'
+        if path.endswith('.tar'):
+            return 'tar'
+        return 'tar.gz'
+
+    def add_project(self, root, directories, plan):
+        """把一个项目的目录和文件写入归档
+
+        Args:
+            root: 项目在归档中的根目录名
+            directories: 需要的目录（相对路径），见 ProjectCreator.plan_directories
+            plan: 渲染结果，相对路径 -> 文件内容（bytes）
+
+        Returns:
+            int: 写入的字节数
+        """
+        for directory in directories:
+            self._add_entry(posixpath.join(root, directory).rstrip('/') + '/', None)
+        for path, content in plan.items():
+            self._add_entry(posixpath.join(root, path), content)
+        written = sum(len(content) for content in plan.values())
+        TRACER.add_args(files=len(plan), bytes=written)
+        return written
+
+    def _add_entry(self, name, content):
+        """写入一个目录（content 为 None）或文件"""
+        if self.format == 'zip':
+            entry = zipfile.ZipInfo(name, time.localtime(self.mtime)[:6])
+            mode = self.DIR_MODE if content is None else self.FILE_MODE
+            entry.external_attr = ((stat.S_IFDIR if content is None else stat.S_IFREG) | mode) << 16
+            if content is None:
+                entry.external_attr |= 0x10  # MS-DOS 目录标记
+                self._archive.writestr(entry, b'')
+            else:
+                entry.compress_type = zipfile.ZIP_DEFLATED
+                self._archive.writestr(entry, content)
+            return
+
+        entry = tarfile.TarInfo(name.rstrip('/'))
+        entry.mtime = self.mtime
+        if content is None:
+            entry.type = tarfile.DIRTYPE
+            entry.mode = self.DIR_MODE
+            self._archive.addfile(entry)
+        else:
+            entry.mode = self.FILE_MODE
+            entry.size = len(content)
+            self._archive.addfile(entry, io.BytesIO(content))
+
+    def close(self):
+        """结束归档并刷新输出"""
+        self._archive.close()
+        if self._fileobj is sys.stdout.buffer:
+            self._fileobj.flush()
+        else:
+            self._fileobj.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@traced
+class TemplateRegistry:
+    """生成文件的模板注册表
+
+    内置模板是 project_templates 包中的 .tmpl 文件，通过 importlib.resources 读取，
+    模板名称为去掉后缀的相对路径（如 'logging/log.py'）。模板使用 string.Template
+    语法：$name 或 ${name} 表示变量，$$ 表示 $。
+
+    模板在第一次使用时才读取并编译为字面量与变量名交替的片段列表，编译结果缓存在内存中，
+    并按源文件的 stat 信息缓存在磁盘上。用户模板目录中的同名文件优先于内置模板。
+    """
+
+    PACKAGE = 'project_templates'
+    SUFFIX = '.tmpl'
+
+    def __init__(self, override_dirs=None, cache_dir=TEMPLATE_CACHE_DIR):
+        if override_dirs is None:
+            override_dirs = [d for d in os.environ.get(TEMPLATE_PATH_ENV, '').split(os.pathsep) if d]
+        self.override_dirs = list(override_dirs)
+        self.cache_dir = cache_dir
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def locate(self, name):
+        """查找模板文件：先查用户模板目录，再查内置模板
+
+        Returns:
+            用户模板的路径（str），或内置模板的 importlib.resources 资源对象
+
+        Raises:
+            ValueError: 模板不存在
+        """
+        parts = f"{name}{self.SUFFIX}".split('/')
+        for directory in self.override_dirs:
+            path = os.path.join(directory, *parts)
+            if os.path.isfile(path):
+                return path
+        if resource_files is not None:
+            resource = resource_files(self.PACKAGE)
+        else:
+            resource = Path(__file__).resolve().parent / self.PACKAGE
+        for part in parts:
+            resource = resource.joinpath(part)
+        if not resource.is_file():
+            raise ValueError(f"找不到模板：{name}")
+        return resource
+
+    def get(self, name):
+        """返回编译后的模板片段（偶数下标为字面量，奇数下标为变量名）"""
+        segments = self._compiled.get(name)
+        if segments is None:
+            with self._lock:
+                segments = self._compiled.get(name)
+                if segments is None:
+                    segments = self._compiled[name] = self._load(name)
+        return segments
+
+    def render(self, name, **values):
+        """用给定的变量渲染模板
+
+        Raises:
+            ValueError: 模板中的变量没有提供
+        """
+        segments = list(self.get(name))
+        for i in range(1, len(segments), 2):
+            if segments[i] not in values:
+                raise ValueError(f"模板 {name} 缺少变量：{segments[i]}")
+            segments[i] = str(values[segments[i]])
+        return ''.join(segments)
+
+    def _load(self, name):
+        """读取并编译模板，真实文件优先使用磁盘上的编译缓存"""
+        source = self.locate(name)
+        if not isinstance(source, (str, os.PathLike)) or not self.cache_dir:
+            # 打包在 zip 等位置的资源没有 stat 信息，直接编译
+            return self.compile(source.read_text(encoding='utf-8'), name)
+
+        path = os.path.abspath(source)
+        key = [path] + _stat_key(os.stat(path))
+        cache_file = os.path.join(self.cache_dir,
+                                  hashlib.sha1(path.encode('utf-8')).hexdigest() + '.json')
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached['key'] == key:
+                return cached['segments']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        with open(path, 'r', encoding='utf-8') as f:
+            segments = self.compile(f.read(), name)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'segments': segments}, f, ensure_ascii=False)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
+        return segments
+
+    @staticmethod
+    def compile(text, name='<string>'):
+        """把模板文本编译为字面量与变量名交替的片段列表
+
+        Raises:
+            ValueError: 模板中有无效的占位符
+        """
+        segments = []
+        literal = []
+        pos = 0
+        for match in string.Template.pattern.finditer(text):
+            literal.append(text[pos:match.start()])
+            pos = match.end()
+            if match.group('escaped') is not None:
+                literal.append('$')
+            elif match.group('invalid') is not None:
+                line = text.count('\n', 0, match.start()) + 1
+                raise ValueError(f"模板 {name} 第 {line} 行有无效的占位符")
+            else:
+                segments.extend([''.join(literal), match.group('named') or match.group('braced')])
+                literal = []
+        literal.append(text[pos:])
+        segments.append(''.join(literal))
+        return segments
+
+
+TEMPLATES = TemplateRegistry()
+
+
+@traced
 class ProjectInfo:
+    PROJECT_NAME_PATTERN = "^[a-zA-Z][a-zA-Z0-9_-]*$"
+    CONFIG_FORMATS = ('yaml', 'json', 'ini', 'toml')
+    # 影响生成内容的字段，会记录在项目清单中
+    TEMPLATE_FIELDS = ('project_name', 'author', 'email', 'description', 'version',
+                       'python_version', 'license', 'use_git', 'use_venv', 'use_logging',
+                       'use_config', 'config_format', 'venv_python')
+
     def __init__(self):
         self.project_name = ""
         self.project_path = ""
@@ -22,40 +901,122 @@ class ProjectInfo:
         self.use_venv = True
         self.use_logging = True
         self.use_config = True
-        self.config_format = "yaml"  # 可选：yaml, json, ini
+        self.config_format = "yaml"  # 可选：yaml, json, ini, toml
+        self.venv_python = ""
+        self.use_venv_cache = True  # 从模板虚拟环境克隆，而不是每次运行 venv
+        self.wheelhouse = ""  # 本地 wheel 目录，设置后离线安装项目依赖
+        self.git_fast_import = True  # 用 git fast-import 直接从渲染结果生成首次提交
+        self.stage_dir = ""  # 暂存目录所在位置（如 /dev/shm），默认与项目目录同级
+        self.resume = False  # 复用上次未完成创建中已完成的步骤（Git、虚拟环境等）
+
+    @classmethod
+    def from_dict(cls, data):
+        """由字典（如批量清单中的一条记录）构建项目信息，不进行交互
+
+        Raises:
+            ValueError: 记录中的字段不合法
+        """
+        info = cls()
+        unknown = set(data) - set(vars(info))
+        if unknown:
+            raise ValueError(f"未知字段：{', '.join(sorted(unknown))}")
+
+        for key, value in data.items():
+            default = getattr(info, key)
+            if isinstance(default, bool):
+                value = _to_bool(value)
+            elif value is None:
+                value = default
+            elif isinstance(default, str):
+                # YAML/JSON 中未加引号的 3.10 会被读成浮点数 3.1，无法还原
+                if isinstance(value, float) and key in ('python_version', 'version'):
+                    raise ValueError(f"{key} 的值 {value!r} 被读成了数字，"
+                                     f"请加引号写成字符串（如 \"3.10\"、\"1.0.0\"）")
+                value = str(value).strip()
+            setattr(info, key, value)
+
+        if not re.match(cls.PROJECT_NAME_PATTERN, info.project_name or ""):
+            raise ValueError(f"项目名称不合法：{info.project_name!r}")
+        if info.email and '@' not in info.email:
+            raise ValueError(f"邮箱地址不合法：{info.email!r}")
+        if info.config_format not in cls.CONFIG_FORMATS:
+            raise ValueError(f"不支持的配置格式：{info.config_format!r}")
+        if not info.project_path:
+            info.project_path = os.getcwd()
+        if not info.python_version.startswith(('>', '<', '=', '~', '!')):
+            info.python_version = f">={info.python_version}"
+        if info.use_venv and not info.venv_python:
+            info.venv_python = sys.executable
+        return info
+
+    def to_dict(self):
+        """导出影响生成内容的字段，与 from_dict 对应"""
+        return {field: getattr(self, field) for field in self.TEMPLATE_FIELDS}
 
     def get_installed_pythons(self):
-        """获取系统中已安装的Python版本"""
+        """获取系统中已安装的Python版本
+
+        候选路径先按真实路径去重，再并发探测版本；探测结果按路径、inode
+        和mtime缓存在磁盘上，解释器未变化时不会执行任何子进程。
+        """
         python_versions = []
         try:
-            # 在macOS中查找Python版本
+            # 在macOS中查找Python版本（包括Homebrew安装的版本）
             python_paths = glob.glob("/usr/local/bin/python3*") + \
                          glob.glob("/usr/bin/python3*") + \
-                         glob.glob(os.path.expanduser("~/Library/Python/*/bin/python3*"))
-            
+                         glob.glob(os.path.expanduser("~/Library/Python/*/bin/python3*")) + \
+                         glob.glob("/usr/local/opt/python@3*/bin/python3") + \
+                         glob.glob("/opt/homebrew/opt/python@3*/bin/python3")
+
+            # 解析符号链接，同一个解释器只探测一次
+            candidates = {}
             for path in python_paths:
+                real_path = os.path.realpath(path)
+                if real_path in candidates:
+                    continue
                 try:
-                    # 获取Python版本
-                    result = subprocess.run([path, '--version'], 
-                                         capture_output=True, 
-                                         text=True, 
-                                         check=True)
-                    version = result.stdout.strip()
-                    python_versions.append((path, version))
-                except subprocess.CalledProcessError:
+                    st = os.stat(real_path)
+                except OSError:
                     continue
-            
-            # 如果找到了Homebrew安装的Python
-            brew_pythons = subprocess.run(['brew', 'list', '--versions', 'python@3*'],
-                                        capture_output=True,
-                                        text=True)
-            if brew_pythons.returncode == 0:
-                for line in brew_pythons.stdout.splitlines():
-                    if line.startswith('python@3'):
-                        brew_version = line.split()[1]
-                        brew_path = f"/usr/local/opt/python@{brew_version}/bin/python3"
-                        if os.path.exists(brew_path):
-                            python_versions.append((brew_path, f"Python {brew_version} (Homebrew)"))
+                if stat.S_ISREG(st.st_mode) and os.access(real_path, os.X_OK):
+                    candidates[real_path] = (path, _stat_key(st))
+
+            cache = _load_python_cache()
+            stale = [real_path for real_path, (_, key) in candidates.items()
+                     if cache.get(real_path, {}).get('key') != key]
+
+            # 并发探测缓存中没有或已变化的解释器
+            if stale:
+                with ThreadPoolExecutor(max_workers=min(len(stale), 16)) as pool:
+                    for real_path, version in zip(stale, pool.map(_probe_python, stale)):
+                        cache[real_path] = {
+                            'key': candidates[real_path][1],
+                            'version': version,
+                        }
+
+            # 去掉已不存在或已变化的解释器；其余条目（如 _python_version 为
+            # venv_python 写入的、不在上面路径中的解释器）原样保留
+            fresh_cache = {}
+            for real_path, entry in cache.items():
+                if real_path in candidates:
+                    key = candidates[real_path][1]
+                else:
+                    try:
+                        key = _stat_key(os.stat(real_path))
+                    except OSError:
+                        continue
+                if isinstance(entry, dict) and entry.get('key') == key:
+                    fresh_cache[real_path] = entry
+            if stale or fresh_cache != cache:
+                _save_python_cache(fresh_cache)
+
+            for real_path, (path, _) in candidates.items():
+                version = fresh_cache[real_path]['version']
+                if not version:
+                    continue
+                if '/opt/python@' in path:
+                    version = f"{version} (Homebrew)"
+                python_versions.append((path, version))
 
         except Exception as e:
             print(f"警告：获取Python版本时出错：{str(e)}")
@@ -69,7 +1030,7 @@ class ProjectInfo:
         # 项目名称
         while True:
             self.project_name = input("请输入项目名称: ").strip()
-            if re.match("^[a-zA-Z][a-zA-Z0-9_-]*$", self.project_name):
+            if re.match(self.PROJECT_NAME_PATTERN, self.project_name):
                 break
             print("错误：项目名称必须以字母开头，只能包含字母、数字、下划线和连字符")
 
@@ -128,17 +1089,18 @@ class ProjectInfo:
 
         if self.use_config:
             while True:
-                format_choice = input("选择配置文件格式 (1: YAML, 2: JSON, 3: INI) [1]: ").strip()
+                format_choice = input("选择配置文件格式 (1: YAML, 2: JSON, 3: INI, 4: TOML) [1]: ").strip()
                 if not format_choice:
                     format_choice = "1"
-                if format_choice in ['1', '2', '3']:
+                if format_choice in ['1', '2', '3', '4']:
                     self.config_format = {
                         '1': 'yaml',
                         '2': 'json',
-                        '3': 'ini'
+                        '3': 'ini',
+                        '4': 'toml'
                     }[format_choice]
                     break
-                print("错误：请输入 1、2 或 3")
+                print("错误：请输入 1、2、3 或 4")
 
         if self.use_venv:
             python_versions = self.get_installed_pythons()
@@ -185,10 +1147,31 @@ class ProjectInfo:
             print("已取消项目创建")
             sys.exit(0)
 
+@traced
 class ProjectCreator:
-    def __init__(self, project_info: ProjectInfo):
+    def __init__(self, project_info: ProjectInfo, quiet=False, archive=None):
         self.info = project_info
         self.project_dir = os.path.join(self.info.project_path, self.info.project_name)
+        # 最终发布位置；创建过程中 project_dir 指向暂存目录
+        self.final_dir = self.project_dir
+        self.quiet = quiet
+        # 指定 ArchiveWriter 时只把文件写入归档，不创建目录、Git仓库和虚拟环境
+        self.archive = archive
+        self.warnings = []
+        # Git仓库的状态：None（本次未初始化，如 resume 时跳过）、initialized、committed 或 failed
+        self._git_state = None
+        # 静默模式下丢弃子进程输出
+        self._subprocess_output = subprocess.DEVNULL if quiet else None
+
+    def _print(self, *args, **kwargs):
+        """输出提示信息，静默模式下不输出"""
+        if not self.quiet:
+            print(*args, **kwargs)
+
+    def _warn(self, message):
+        """记录警告信息，静默模式下只记录不输出"""
+        self.warnings.append(message)
+        self._print(f"警告：{message}")
 
     def create_project_structure(self):
         """创建项目基本结构"""
@@ -210,371 +1193,75 @@ class ProjectCreator:
             dir_path = os.path.join(self.project_dir, directory)
             os.makedirs(dir_path, exist_ok=True)
 
-    def create_basic_files(self):
-        """创建基本的项目文件"""
-        # 创建 README.md
-        readme_content = f"""# {self.info.project_name}
-
-## 描述
-{self.info.description}
-
-## 安装
-```bash
-# 创建虚拟环境
-python -m venv .venv
-
-# 激活虚拟环境
-source .venv/bin/activate  # Linux/macOS
-.venv\\Scripts\\activate  # Windows
-
-# 安装依赖
-pip install -r requirements.txt
-
-# 安装开发模式
-pip install -e .
-```
-
-## 使用方法
-```python
-from {self.info.project_name} import main
-
-main()
-```
-
-## 开发者
-- {self.info.author} ({self.info.email})
-
-## 开源协议
-{self.info.license} License
-"""
-        with open(os.path.join(self.project_dir, 'README.md'), 'w') as f:
-            f.write(readme_content)
-
-        # 创建 requirements.txt
-        with open(os.path.join(self.project_dir, 'requirements.txt'), 'w') as f:
-            f.write('# 项目依赖\n')
-            f.write('# 每行一个依赖，例如：\n')
-            f.write('# requests>=2.28.0\n')
-            f.write('# pandas>=1.5.0\n')
-
-        # 创建 setup.py
-        setup_content = f'''from setuptools import setup, find_packages
-
-def read_requirements(filename):
-    """读取requirements.txt文件内容."""
-    with open(filename, 'r', encoding='utf-8') as f:
-        # 过滤掉注释和空行
-        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
-
-setup(
-    name="{self.info.project_name}",
-    version="{self.info.version}",
-    package_dir={{"": "src"}},
-    packages=find_packages(where="src"),
-    install_requires=read_requirements('requirements.txt'),
-    author="{self.info.author}",
-    author_email="{self.info.email}",
-    description="{self.info.description}",
-    long_description=open("README.md").read(),
-    long_description_content_type="text/markdown",
-    url="https://github.com/{self.info.author}/{self.info.project_name}",
-    classifiers=[
-        "Programming Language :: Python :: 3",
-        "License :: OSI Approved :: {self.info.license} License",
-        "Operating System :: OS Independent",
-    ],
-    python_requires="{self.info.python_version}",
-)
-'''
-        with open(os.path.join(self.project_dir, 'setup.py'), 'w') as f:
-            f.write(setup_content)
-
-        # 创建包的 __init__.py
-        init_path = os.path.join(self.project_dir, 'src', self.info.project_name, '__init__.py')
-        init_content = f'''"""
-{self.info.project_name} package.
-
-{self.info.description}
-"""
-
-__version__ = "{self.info.version}"
-__author__ = "{self.info.author}"
-__email__ = "{self.info.email}"
-'''
-        with open(init_path, 'w') as f:
-            f.write(init_content)
-
-        # 创建 main.py
-        main_content = '''"""Main module."""
-
-def main():
-    """Main function."""
-    print("Hello, World!")
-
-if __name__ == "__main__":
-    main()
-'''
-        main_path = os.path.join(self.project_dir, 'src', self.info.project_name, 'main.py')
-        with open(main_path, 'w') as f:
-            f.write(main_content)
-
-        # 创建测试文件
-        test_content = f'''"""Test module."""
-import unittest
-from {self.info.project_name}.main import main
-
-class TestMain(unittest.TestCase):
-    """Test cases for main module."""
-    
-    def test_main(self):
-        """Test main function."""
-        # Add your test cases here
-        self.assertTrue(True)
-
-if __name__ == '__main__':
-    unittest.main()
-'''
-        with open(os.path.join(self.project_dir, 'tests', 'test_main.py'), 'w') as f:
-            f.write(test_content)
-
-        # 创建utils目录和日志模块
-        if self.info.use_logging:
-            utils_dir = os.path.join(self.project_dir, 'src', self.info.project_name, 'utils')
-            os.makedirs(utils_dir, exist_ok=True)
-            self._create_logging_module(utils_dir)
+    def _template_values(self):
+        """模板中可用的变量"""
+        # README.md：创建虚拟环境时直接写明所选的Python
+        venv_command = "python -m venv .venv"
+        if self.info.use_venv and self.info.venv_python:
+            venv_command = f"{self.info.venv_python} -m venv .venv  # 使用 {self.info.venv_python}"
+        return {
+            'project_name': self.info.project_name,
+            'author': self.info.author,
+            'email': self.info.email,
+            'description': self.info.description,
+            'version': self.info.version,
+            'python_version': self.info.python_version,
+            'license': self.info.license,
+            'config_format': self.info.config_format,
+            'config_format_upper': self.info.config_format.upper(),
+            'env_prefix': re.sub(r'\W', '_', self.info.project_name.upper()) + '_',
+            'venv_command': venv_command,
+            'requirements': ''.join(f'{requirement}\n' for requirement in self.requirements()),
+        }
 
-        # 创建配置系统
+    def _render_basic_files(self, plan, values):
+        """渲染基本的项目文件"""
+        package_dir = f'src/{self.info.project_name}'
+        for path, name in (
+            ('README.md', 'basic/README.md'),
+            ('requirements.txt', 'basic/requirements.txt'),
+            ('setup.py', 'basic/setup.py'),
+            (f'{package_dir}/__init__.py', 'basic/package_init.py'),
+            (f'{package_dir}/main.py', 'basic/main.py'),
+            ('tests/test_main.py', 'basic/test_main.py'),
+        ):
+            plan[path] = TEMPLATES.render(name, **values)
+
+    def requirements(self):
+        """生成的项目运行所需的依赖"""
+        requirements = []
         if self.info.use_config:
-            self._create_config_module()
-
-    def _create_logging_module(self, utils_dir):
-        """创建日志模块"""
-        log_content = '''"""
-日志模块，提供统一的日志记录功能。
-
-特性：
-1. 同时输出到文件和终端
-2. 文件日志级别为INFO
-3. 终端日志级别为DEBUG
-4. 终端输出包含详细的模块位置信息
-"""
-import os
-import logging
-from logging.handlers import RotatingFileHandler
-import sys
-
-def setup_logger(name, log_dir='logs'):
-    """
-    设置日志记录器
-    
-    Args:
-        name: 日志记录器名称
-        log_dir: 日志文件存储目录
-    
-    Returns:
-        logger: 配置好的日志记录器
-    """
-    # 创建日志目录
-    os.makedirs(log_dir, exist_ok=True)
-    
-    # 创建logger
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-    
-    # 避免重复添加handler
-    if logger.handlers:
-        return logger
-    
-    # 创建文件处理器
-    log_file = os.path.join(log_dir, f'{name}.log')
-    file_handler = RotatingFileHandler(
-        log_file,
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5,
-        encoding='utf-8'
-    )
-    file_handler.setLevel(logging.INFO)
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    file_handler.setFormatter(file_formatter)
-    
-    # 创建控制台处理器
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.DEBUG)
-    console_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    console_handler.setFormatter(console_formatter)
-    
-    # 添加处理器到logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
-    return logger
-
-# 示例用法
-if __name__ == '__main__':
-    logger = setup_logger('test_logger')
-    logger.debug('这是一条调试信息')
-    logger.info('这是一条信息')
-    logger.warning('这是一条警告')
-    logger.error('这是一条错误信息')
-'''
-        
-        # 创建日志模块文件
-        log_file = os.path.join(utils_dir, 'log.py')
-        with open(log_file, 'w') as f:
-            f.write(log_content)
-            
-        # 创建utils包的__init__.py
-        init_file = os.path.join(utils_dir, '__init__.py')
-        with open(init_file, 'w') as f:
-            f.write('"""工具模块包"""\n\n')
-            f.write('from .log import setup_logger\n\n')
-            f.write('__all__ = ["setup_logger"]\n')
-
-    def _create_config_module(self):
-        """创建配置模块"""
-        config_dir = os.path.join(self.project_dir, 'src', self.info.project_name, 'config')
-        os.makedirs(config_dir, exist_ok=True)
-
-        # 创建配置处理模块
-        config_content = '''"""
-配置管理模块，提供统一的配置加载和处理功能。
-
-特性：
-1. 多格式支持 (YAML/JSON/INI)
-2. 分层配置 (默认/环境/本地)
-3. 环境变量支持
-4. 配置验证
-"""
-import os
-import json
-from pathlib import Path
-from typing import Any, Dict, Optional
-from pydantic import BaseModel, Field
-try:
-    import yaml
-except ImportError:
-    yaml = None
-try:
-    import tomli
-except ImportError:
-    tomli = None
-from configparser import ConfigParser
-
-class ConfigError(Exception):
-    """配置相关错误"""
-    pass
-
-class AppConfig(BaseModel):
-    """应用配置模型"""
-    # 在这里定义你的配置项
-    app_name: str = Field(default="", description="应用名称")
-    debug: bool = Field(default=False, description="是否开启调试模式")
-    host: str = Field(default="127.0.0.1", description="服务主机地址")
-    port: int = Field(default=8000, description="服务端口")
-    
-    class Config:
-        extra = "allow"  # 允许额外字段
-
-class ConfigLoader:
-    """配置加载器"""
-    
-    def __init__(self, config_dir: str = "config"):
-        self.config_dir = Path(config_dir)
-        self.config_format = "{}"  # 由具体项目设置
-        self._config: Dict[str, Any] = {}
-        
-    def load_config(self, env: str = None) -> AppConfig:
-        """
-        加载配置
-        
-        Args:
-            env: 环境名称 (development/production)
-        
-        Returns:
-            AppConfig: 配置对象
-        """
-        # 1. 加载默认配置
-        default_config = self._load_file("default")
-        self._config.update(default_config or {})
-        
-        # 2. 加载环境配置
-        if env:
-            env_config = self._load_file(env)
-            self._config.update(env_config or {})
-        
-        # 3. 加载本地配置
-        local_config = self._load_file("local")
-        self._config.update(local_config or {})
-        
-        # 4. 环境变量覆盖
-        self._load_from_env()
-        
-        return AppConfig(**self._config)
-    
-    def _load_file(self, name: str) -> Optional[Dict[str, Any]]:
-        """加载配置文件"""
-        file_path = self.config_dir / f"{name}.{self.config_format}"
-        if not file_path.exists():
-            return None
-            
-        with open(file_path, 'r', encoding='utf-8') as f:
-            if self.config_format == 'yaml':
-                if yaml is None:
-                    raise ConfigError("PyYAML is required for yaml config")
-                return yaml.safe_load(f)
-            elif self.config_format == 'json':
-                return json.load(f)
-            elif self.config_format == 'ini':
-                parser = ConfigParser()
-                parser.read_file(f)
-                return {s: dict(parser.items(s)) for s in parser.sections()}
-            
-        return None
-    
-    def _load_from_env(self):
-        """从环境变量加载配置"""
-        prefix = f"{self.info.project_name.upper()}_"
-        for key, value in os.environ.items():
-            if key.startswith(prefix):
-                config_key = key[len(prefix):].lower()
-                # 处理嵌套键
-                keys = config_key.split('_')
-                current = self._config
-                for k in keys[:-1]:
-                    current = current.setdefault(k, {})
-                current[keys[-1]] = value
-
-# 使用示例
-if __name__ == '__main__':
-    loader = ConfigLoader()
-    loader.config_format = 'yaml'  # 或 'json' 或 'ini'
-    config = loader.load_config(env='development')
-    print(f"应用名称: {config.app_name}")
-    print(f"调试模式: {config.debug}")
-'''
-        
-        # 创建配置模块文件
-        config_file = os.path.join(config_dir, 'config.py')
-        with open(config_file, 'w') as f:
-            f.write(config_content)
-            
-        # 创建配置文件示例
-        self._create_config_examples(config_dir)
-        
-        # 创建config包的__init__.py
-        init_file = os.path.join(config_dir, '__init__.py')
-        with open(init_file, 'w') as f:
-            f.write('"""配置管理包"""\n\n')
-            f.write('from .config import ConfigLoader, AppConfig, ConfigError\n\n')
-            f.write('__all__ = ["ConfigLoader", "AppConfig", "ConfigError"]\n')
-            
-    def _create_config_examples(self, config_dir):
-        """创建配置文件示例"""
+            requirements.append('pydantic>=2.0')
+            if self.info.config_format == 'yaml':
+                requirements.append('pyyaml>=6.0')
+            elif self.info.config_format == 'toml':
+                # Python 3.11 起标准库自带 tomllib
+                requirements.append('tomli>=1.1.0; python_version < "3.11"')
+        return requirements
+
+    def _render_logging_module(self, plan, values):
+        """渲染日志模块"""
+        utils_dir = f'src/{self.info.project_name}/utils'
+        plan[f'{utils_dir}/log.py'] = TEMPLATES.render('logging/log.py', **values)
+        plan[f'{utils_dir}/__init__.py'] = TEMPLATES.render('logging/__init__.py', **values)
+        plan[f'{utils_dir}/__main__.py'] = TEMPLATES.render('logging/__main__.py', **values)
+        plan['tests/test_log.py'] = TEMPLATES.render('logging/test_log.py', **values)
+        plan['benchmarks/bench_log.py'] = TEMPLATES.render('logging/bench_log.py', **values)
+
+    def _render_config_module(self, plan, values):
+        """渲染配置模块"""
+        config_dir = f'src/{self.info.project_name}/config'
+        plan[f'{config_dir}/config.py'] = TEMPLATES.render('config/config.py', **values)
+
+        # 配置文件示例
+        self._render_config_examples(plan, config_dir)
+
+        plan[f'{config_dir}/__init__.py'] = TEMPLATES.render('config/__init__.py', **values)
+        plan[f'{config_dir}/__main__.py'] = TEMPLATES.render('config/__main__.py', **values)
+        plan['benchmarks/bench_config.py'] = TEMPLATES.render('config/bench_config.py', **values)
+
+    def _render_config_examples(self, plan, config_dir):
+        """渲染配置文件示例"""
         example_config = {
             'app_name': self.info.project_name,
             'debug': True,
@@ -590,21 +1277,23 @@ if __name__ == '__main__':
         if self.info.config_format == 'yaml':
             try:
                 import yaml
-                ext = 'yaml'
-                def write_config(f, data):
-                    yaml.safe_dump(data, f, default_flow_style=False)
             except ImportError:
-                print("警告：未安装PyYAML，将使用JSON格式替代")
+                self._warn("未安装PyYAML，将使用JSON格式替代")
                 self.info.config_format = 'json'
-                
-        if self.info.config_format == 'json':
-            ext = 'json'
-            def write_config(f, data):
-                json.dump(data, f, indent=2)
+
+        ext = self.info.config_format
+        if ext == 'yaml':
+            def dump_config(data):
+                return yaml.safe_dump(data, default_flow_style=False)
+        elif ext == 'json':
+            def dump_config(data):
+                return json.dumps(data, indent=2)
+        elif ext == 'toml':
+            dump_config = _toml_dumps
         else:  # ini
             ext = 'ini'
             from configparser import ConfigParser
-            def write_config(f, data):
+            def dump_config(data):
                 config = ConfigParser()
                 config['DEFAULT'] = {
                     'app_name': data['app_name'],
@@ -617,358 +1306,1021 @@ if __name__ == '__main__':
                     'port': str(data['database']['port']),
                     'name': data['database']['name']
                 }
-                config.write(f)
-        
-        # 创建默认配置
-        with open(os.path.join(config_dir, f'default.{ext}'), 'w') as f:
-            write_config(f, example_config)
-            
-        # 创建环境配置示例
+                buffer = io.StringIO()
+                config.write(buffer)
+                return buffer.getvalue()
+
+        # 默认配置
+        plan[f'{config_dir}/default.{ext}'] = dump_config(example_config)
+
+        # 环境配置示例
         example_config['debug'] = False
-        with open(os.path.join(config_dir, f'production.{ext}'), 'w') as f:
-            write_config(f, example_config)
-            
-        # 创建本地配置示例
+        plan[f'{config_dir}/production.{ext}'] = dump_config(example_config)
+
+        # 本地配置示例
         example_config['database']['host'] = 'dev.local'
-        with open(os.path.join(config_dir, f'local.{ext}.example'), 'w') as f:
-            write_config(f, example_config)
-            
-        # 更新 .gitignore
-        gitignore_path = os.path.join(self.project_dir, '.gitignore')
-        with open(gitignore_path, 'a') as f:
-            f.write(f'\n# Local config\nconfig/local.{ext}\n')
-
-    def _create_helper_docs(self):
-        """创建帮助文档"""
-        docs_dir = os.path.join(self.project_dir, 'docs')
-        helper_content = f"""# {self.info.project_name} 使用指南
-
-本文档提供了项目中各个功能模块的使用方法和示例。
-
-"""
+        plan[f'{config_dir}/local.{ext}.example'] = dump_config(example_config)
+
+        # 本地配置不提交到Git
+        plan['.gitignore'] = (plan.get('.gitignore', '') + f'\n# Local config\nconfig/local.{ext}\n'
+                              '.snapshot-*.bin\n')
+
+    def _render_helper_docs(self, plan, values):
+        """渲染帮助文档"""
+        names = ['docs/helper.md']
         if self.info.use_logging:
-            helper_content += """## 日志系统使用指南
+            names.append('docs/helper_logging.md')
+        if self.info.use_config:
+            names += ['docs/helper_config.md', f'docs/helper_config_{self.info.config_format}.md',
+                      'docs/helper_config_footer.md']
+        plan['docs/helper.md'] = ''.join(TEMPLATES.render(name, **values) for name in names)
 
-### 1. 基本用法
+    def _render_gitignore(self, plan, values):
+        """渲染 .gitignore"""
+        plan['.gitignore'] = TEMPLATES.render('basic/gitignore', **values)
 
-```python
-from utils.log import setup_logger
+    def render_plan(self):
+        """渲染项目的全部文件，不访问磁盘
 
-# 创建日志记录器
-logger = setup_logger('my_module')
+        Returns:
+            dict: 相对于项目目录的路径（使用 / 分隔）到文件内容（bytes）的映射
+        """
+        plan = {}
+        values = self._template_values()
+        if self.info.use_git:
+            self._render_gitignore(plan, values)
+        self._render_basic_files(plan, values)
+        if self.info.use_logging:
+            self._render_logging_module(plan, values)
+        if self.info.use_config:
+            self._render_config_module(plan, values)
+        if self.info.use_logging or self.info.use_config:
+            self._render_helper_docs(plan, values)
+        plan = {path: content.encode('utf-8') for path, content in plan.items()}
+        plan[MANIFEST_FILE] = self._render_manifest(
+            {path: hashlib.sha256(content).hexdigest() for path, content in plan.items()})
+        TRACER.add_args(files=len(plan), bytes=sum(len(content) for content in plan.values()))
+        return plan
+
+    def _render_manifest(self, file_hashes):
+        """渲染项目清单：生成参数和每个生成文件内容的哈希"""
+        manifest = {
+            'generator': 'project_creater',
+            'info': self.info.to_dict(),
+            'files': file_hashes,
+        }
+        return (json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True) + '\n').encode('utf-8')
 
-# 使用日志记录器
-logger.debug('调试信息')    # 只会显示在终端
-logger.info('普通信息')     # 同时记录到文件和终端
-logger.warning('警告信息')  # 同时记录到文件和终端
-logger.error('错误信息')    # 同时记录到文件和终端
-```
+    def update(self, dry_run=False):
+        """按当前模板增量更新已有项目
 
-### 2. 日志配置说明
+        只写入模板输出发生变化、且用户没有修改过的文件。是否被用户修改，
+        通过比较磁盘内容与项目清单中记录的上次生成内容的哈希来判断。
 
-- 日志文件位置：`logs/{logger_name}.log`
-- 日志文件大小：最大 10MB，超过后自动轮转
-- 保留文件数：最多保留 5 个历史文件
+        Returns:
+            dict: 状态 -> 文件路径列表。状态包括 created（新增）、updated（已更新）、
+            unchanged（无变化）、kept（用户修改过，模板未变，保留）、
+            conflict（用户修改过且模板也变了，未写入）、deleted（用户删除，未恢复）
+        """
+        manifest_path = os.path.join(self.project_dir, MANIFEST_FILE)
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                old_hashes = json.load(f).get('files', {})
+        except FileNotFoundError:
+            old_hashes = {}
+
+        plan = self.render_plan()
+        del plan[MANIFEST_FILE]
+        report = {status: [] for status in
+                  ('created', 'updated', 'unchanged', 'kept', 'conflict', 'deleted')}
+        changes = {}
+        hashes = {}
+        for path, content in plan.items():
+            new_hash = hashlib.sha256(content).hexdigest()
+            old_hash = old_hashes.get(path)
+            try:
+                with open(os.path.join(self.project_dir, path), 'rb') as f:
+                    disk_hash = hashlib.sha256(f.read()).hexdigest()
+            except FileNotFoundError:
+                disk_hash = None
+
+            if disk_hash == new_hash:
+                status = 'unchanged'
+            elif disk_hash is None:
+                status = 'created' if old_hash is None else 'deleted'
+            elif disk_hash == old_hash:
+                status = 'updated'
+            elif old_hash == new_hash:
+                status = 'kept'
+            else:
+                status = 'conflict'
+
+            report[status].append(path)
+            if status in ('created', 'updated'):
+                changes[path] = content
+            # 未写入的文件保留旧哈希，下次仍能识别出用户的修改
+            hashes[path] = new_hash if status in ('created', 'updated', 'unchanged') else old_hash
+            if hashes[path] is None:
+                del hashes[path]
+
+        if not dry_run:
+            changes[MANIFEST_FILE] = self._render_manifest(hashes)
+            self.write_plan(changes)
+        TRACER.add_args(files=len(changes))
+        return report
+
+    def plan_directories(self, plan):
+        """计算写出渲染结果需要的全部目录（相对路径，父目录在前）"""
+        directories = {''}
+        for path in list(plan) + ['tests/', 'docs/', f'src/{self.info.project_name}/']:
+            directory = posixpath.dirname(path)
+            while directory not in directories:
+                directories.add(directory)
+                directory = posixpath.dirname(directory)
+        return sorted(directories)
+
+    def write_plan(self, plan):
+        """一次性写出渲染结果：每个目录只创建一次，每个文件只打开一次
 
-### 3. 日志级别
+        Returns:
+            int: 写入的字节数
+        """
+        for directory in self.plan_directories(plan):
+            os.makedirs(os.path.join(self.project_dir, directory), exist_ok=True)
 
-- 终端输出：DEBUG 及以上级别
-- 文件记录：INFO 及以上级别
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+        written = 0
+        for path, content in plan.items():
+            fd = os.open(os.path.join(self.project_dir, path), flags, 0o644)
+            try:
+                view = memoryview(content)
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
+            written += len(content)
+        TRACER.add_args(files=len(plan), bytes=written)
+        return written
 
-### 4. 日志格式
+    def create_project(self):
+        """渲染并写出项目文件"""
+        self.plan = self.render_plan()
+        self.write_plan(self.plan)
 
-#### 终端输出格式
-```
-时间戳 - 模块名 - 日志级别 - [文件名:行号] - 消息内容
-```
+    def init_git(self):
+        """初始化git仓库；使用 fast-import 时直接由渲染结果生成首次提交
 
-#### 文件记录格式
-```
-时间戳 - 模块名 - 日志级别 - 消息内容
-```
+        项目目录可能还没有被写文件的步骤创建，因此先创建它。
+        没有用 fast-import 提交时，首次提交由 commit_git 在写完文件后完成。
+        """
+        if not self.info.use_git:
+            return
 
-### 5. 最佳实践
+        self._git_state = 'failed'
+        try:
+            os.makedirs(self.project_dir, exist_ok=True)
+            run_subprocess(['git', 'init'], cwd=self.project_dir, check=True,
+                           stdout=self._subprocess_output,
+                           stderr=self._subprocess_output)
+            self._git_state = 'initialized'
 
-- 在模块级别创建日志记录器
-- 使用有意义的日志记录器名称
-- 适当使用不同的日志级别
-- DEBUG：详细的调试信息
-- INFO：重要的程序状态信息
-- WARNING：需要注意但不是错误的情况
-- ERROR：错误信息
+            if self.info.git_fast_import:
+                try:
+                    self._fast_import_commit()
+                    self._git_state = 'committed'
+                    self._print("Git仓库初始化成功！")
+                except Exception as e:
+                    self._warn(f"git fast-import 失败，将使用 git add/commit：{str(e)}")
+            return True
+        except subprocess.CalledProcessError:
+            self._warn("Git初始化失败。请确保已安装git。")
+        except Exception as e:
+            self._warn(f"Git初始化失败：{str(e)}")
+
+    def _git_has_commit(self):
+        """仓库是否已经有提交（resume 时 init_git 被跳过，需要检查上次的结果）"""
+        if not os.path.isdir(os.path.join(self.project_dir, '.git')):
+            return False
+        result = run_subprocess(['git', 'rev-parse', '--verify', '--quiet', 'HEAD'],
+                                cwd=self.project_dir, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL)
+        return result.returncode == 0
+
+    def commit_git(self):
+        """用 git add/commit 生成首次提交，必须在写完所有文件之后执行"""
+        if not self.info.use_git or self._git_state == 'failed':
+            return
+        if self._git_state == 'committed':
+            return True
+        if self._git_state is None and self._git_has_commit():
+            return True
 
-### 6. 示例代码
+        try:
+            run_subprocess(['git', 'add', '.'], cwd=self.project_dir, check=True,
+                           stdout=self._subprocess_output,
+                           stderr=self._subprocess_output)
+            run_subprocess(['git', 'commit', '-m', 'Initial commit'], cwd=self.project_dir, check=True,
+                           stdout=self._subprocess_output,
+                           stderr=self._subprocess_output)
+            self._git_state = 'committed'
+            self._print("Git仓库初始化成功！")
+            return True
+        except subprocess.CalledProcessError:
+            self._warn("Git初始化失败。请确保已安装git。")
+        except Exception as e:
+            self._warn(f"Git初始化失败：{str(e)}")
 
-```python
-from utils.log import setup_logger
+    def _fast_import_commit(self, message='Initial commit'):
+        """用一次 git fast-import 从渲染结果生成首次提交
 
-# 创建模块级别的日志记录器
-logger = setup_logger(__name__)
+        文件内容已经在内存中，不需要像 `git add .` 那样重新扫描和哈希工作区；
+        提交后用 `git read-tree` 填充索引。
+        """
+        # 与 git commit 使用相同的作者和提交者身份
+        result = run_subprocess(['git', 'var', '-l'], cwd=self.project_dir, check=True,
+                                capture_output=True, text=True)
+        idents = dict(line.split('=', 1) for line in result.stdout.splitlines()
+                      if line.startswith(('GIT_AUTHOR_IDENT=', 'GIT_COMMITTER_IDENT=')))
+        if len(idents) != 2:
+            raise RuntimeError("无法获取Git作者信息")
+
+        with open(os.path.join(self.project_dir, '.git', 'HEAD'), 'r', encoding='utf-8') as f:
+            branch = f.read().strip().split('ref: ', 1)[-1]
+
+        chunks = []
+        for mark, content in enumerate(self.plan.values(), 1):
+            chunks.append(b'blob\nmark :%d\ndata %d\n' % (mark, len(content)))
+            chunks.append(content)
+            chunks.append(b'\n')
+        message = f"{message}\n".encode('utf-8')
+        chunks.append(
+            f"commit {branch}\n"
+            f"author {idents['GIT_AUTHOR_IDENT']}\n"
+            f"committer {idents['GIT_COMMITTER_IDENT']}\n"
+            f"data {len(message)}\n".encode('utf-8')
+        )
+        chunks.append(message)
+        for mark, path in enumerate(self.plan, 1):
+            chunks.append(f"M 100644 :{mark} {path}\n".encode('utf-8'))
+        chunks.append(b'\ndone\n')
+        stream = b''.join(chunks)
+        TRACER.add_args(files=len(self.plan), bytes=len(stream))
+
+        run_subprocess(['git', 'fast-import', '--quiet', '--done'], cwd=self.project_dir,
+                       input=stream, check=True,
+                       stdout=self._subprocess_output, stderr=self._subprocess_output)
+        run_subprocess(['git', 'read-tree', 'HEAD'], cwd=self.project_dir, check=True,
+                       stdout=self._subprocess_output, stderr=self._subprocess_output)
+
+    def create_venv(self):
+        """创建虚拟环境"""
+        if not self.info.use_venv:
+            return
 
-class MyClass:
-    def __init__(self):
-        logger.debug('初始化 MyClass 实例')
-        
-    def process_data(self, data):
-        logger.info(f'开始处理数据，数据大小：{len(data)}')
         try:
-            # 处理数据
-            result = self._process(data)
-            logger.debug(f'数据处理结果：{result}')
-            return result
+            venv_path = os.path.join(self.project_dir, '.venv')
+            self._print(f"\n正在创建虚拟环境...")
+            if self.info.use_venv_cache and os.name != 'nt':
+                try:
+                    VenvCache(output=self._subprocess_output).clone(self.info.venv_python, venv_path)
+                    self._print("虚拟环境创建成功！")
+                    return True
+                except Exception as e:
+                    self._warn(f"无法从模板克隆虚拟环境，将直接创建：{str(e)}")
+                    shutil.rmtree(venv_path, ignore_errors=True)
+            run_subprocess([self.info.venv_python, '-m', 'venv', venv_path], check=True,
+                           stdout=self._subprocess_output,
+                           stderr=self._subprocess_output)
+            self._print("虚拟环境创建成功！")
+            return True
+
+        except subprocess.CalledProcessError:
+            self._warn("虚拟环境创建失败")
         except Exception as e:
-            logger.error(f'数据处理失败：{str(e)}')
-            raise
-```
-"""
+            self._warn(f"虚拟环境创建失败：{str(e)}")
 
-        if self.info.use_config:
-            helper_content += f"""## 配置系统使用指南
+    def install_requirements(self):
+        """从本地 wheel 目录离线安装项目依赖"""
+        venv_path = os.path.join(self.project_dir, '.venv')
+        requirements = self.requirements()
+        if not (self.info.use_venv and self.info.wheelhouse and requirements):
+            return
+        if not os.path.exists(os.path.join(venv_path, 'pyvenv.cfg')):
+            return
 
-### 1. 基本用法
+        self._print("\n正在离线安装依赖...")
+        try:
+            if os.name != 'nt':
+                try:
+                    Wheelhouse(self.info.wheelhouse,
+                               output=self._subprocess_output).install(venv_path, requirements)
+                    self._print("依赖安装成功！")
+                    return True
+                except Exception as e:
+                    self._warn(f"无法链接安装依赖，将使用pip安装：{str(e)}")
+            python = os.path.join(venv_path, 'Scripts' if os.name == 'nt' else 'bin', 'python')
+            # 链接安装中途失败时可能已经装了一部分，强制重装，否则 pip 会认为依赖已满足
+            run_subprocess([python, '-m', 'pip', 'install', '--no-index', '--force-reinstall',
+                            '--find-links', self.info.wheelhouse] + requirements,
+                           check=True,
+                           stdout=self._subprocess_output,
+                           stderr=self._subprocess_output)
+            self._print("依赖安装成功！")
+            return True
+        except subprocess.CalledProcessError:
+            self._warn("依赖安装失败")
 
-```python
-from config import ConfigLoader
+    def render(self):
+        """渲染项目文件（create 的一个步骤）"""
+        self.plan = self.render_plan()
 
-# 创建配置加载器
-loader = ConfigLoader()
-loader.config_format = '{self.info.config_format}'  # 配置文件格式
+    def write(self):
+        """写出渲染结果（create 的一个步骤）"""
+        self.write_plan(self.plan)
 
-# 加载配置
-config = loader.load_config(env='development')  # 或 'production'
+    def write_archive(self):
+        """把渲染结果写入归档（create 的一个步骤）"""
+        self.archive.add_project(self.info.project_name, self.plan_directories(self.plan), self.plan)
 
-# 使用配置
-print(f"应用名称: {{config.app_name}}")
-print(f"调试模式: {{config.debug}}")
-print(f"数据库配置: {{config.database['host']}}")
-```
+    def steps(self):
+        """项目创建步骤及其依赖关系
 
-### 2. 配置文件
+        虚拟环境不依赖项目文件，因此与渲染、写文件和Git初始化并行执行；
+        git init 和 fast-import 提交直接使用渲染结果，不必等待写文件；
+        git add/commit（未使用 fast-import 或其失败时）要等写完所有文件。
 
-项目使用分层配置系统，按以下优先级从高到低加载：
+        Returns:
+            list: [(步骤名称, 可调用对象, 依赖的步骤名称列表)]
+        """
+        if self.archive is not None:
+            return [
+                ('render', self.render, []),
+                ('archive', self.write_archive, ['render']),
+            ]
+        return [
+            ('render', self.render, []),
+            ('write', self.write, ['render']),
+            ('git', self.init_git, ['render']),
+            ('git_commit', self.commit_git, ['git', 'write']),
+            ('venv', self.create_venv, []),
+            ('requirements', self.install_requirements, ['venv']),
+        ]
 
-1. 本地配置：`config/local.{self.info.config_format}`（不提交到Git）
-2. 环境配置：`config/production.{self.info.config_format}`
-3. 默认配置：`config/default.{self.info.config_format}`
+    # 可以在 resume 时复用的步骤
+    RESUMABLE_STEPS = ('git', 'git_commit', 'venv', 'requirements')
 
-### 3. 配置格式
+    def _stage_paths(self):
+        """暂存目录及其状态文件的路径"""
+        stage_parent = self.info.stage_dir or self.info.project_path
+        stage = os.path.join(os.path.abspath(stage_parent), f'.{self.info.project_name}.partial')
+        return stage, f'{stage}.json'
 
-使用 {self.info.config_format.upper()} 格式存储配置，示例：
+    def _begin_stage(self):
+        """创建（或在 resume 时复用）暂存目录，返回已完成的步骤
 
-"""
-            if self.info.config_format == 'yaml':
-                helper_content += """```yaml
-app_name: myapp
-debug: true
-host: 127.0.0.1
-port: 8000
-database:
-  host: localhost
-  port: 5432
-  name: mydb
-```
-"""
-            elif self.info.config_format == 'json':
-                helper_content += """```json
-{
-  "app_name": "myapp",
-  "debug": true,
-  "host": "127.0.0.1",
-  "port": 8000,
-  "database": {
-    "host": "localhost",
-    "port": 5432,
-    "name": "mydb"
-  }
-}
-```
-"""
-            else:  # ini
-                helper_content += """```ini
-[DEFAULT]
-app_name = myapp
-debug = true
-host = 127.0.0.1
-port = 8000
-
-[database]
-host = localhost
-port = 5432
-name = mydb
-```
-"""
-
-            helper_content += """
-### 4. 环境变量支持
-
-可以使用环境变量覆盖配置值，环境变量名格式：`项目名称大写_配置路径`
-
-示例：
-```bash
-# 设置数据库主机
-export MYAPP_DATABASE_HOST=db.example.com
-
-# 设置端口
-export MYAPP_PORT=9000
-```
-
-### 5. 配置验证
-
-使用 Pydantic 进行配置验证，可以在 `config.py` 中的 `AppConfig` 类中定义配置项：
-
-```python
-from pydantic import BaseModel, Field
-
-class AppConfig(BaseModel):
-    app_name: str = Field(default="", description="应用名称")
-    debug: bool = Field(default=False, description="是否开启调试模式")
-    port: int = Field(default=8000, description="服务端口")
-    
-    class Config:
-        extra = "allow"  # 允许额外字段
-```
+        整个创建过程持有状态文件上的排他 flock：另一个进程正在创建同一项目时立即失败，
+        而不是把它的暂存目录当作可以 resume 的未完成创建。锁在发布或放弃时释放。
+        """
+        stage, state_file = self._stage_paths()
+        # 发布时要在 project_path 中 rename，它不存在时与原来一样先创建
+        os.makedirs(self.info.project_path, exist_ok=True)
+        os.makedirs(os.path.dirname(stage), exist_ok=True)
 
-### 6. 最佳实践
+        self._stage_fd = os.open(state_file, os.O_RDWR | os.O_CREAT, 0o644)
+        locked = False
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(self._stage_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise FileExistsError(f"另一个进程正在创建同一项目：{stage}")
+                # 拿到锁之前另一个进程已经发布并删除了状态文件
+                try:
+                    same_file = os.path.samestat(os.fstat(self._stage_fd), os.stat(state_file))
+                except FileNotFoundError:
+                    same_file = False
+                if not same_file:
+                    raise FileExistsError(f"另一个进程刚刚结束了同一项目的创建：{stage}")
+            locked = True
+
+            if os.path.exists(self.final_dir) and os.listdir(self.final_dir):
+                raise FileExistsError(f"目标目录已存在且不为空：{self.final_dir}")
+            try:
+                os.mkdir(stage)
+                done = set()
+                os.ftruncate(self._stage_fd, 0)
+            except FileExistsError:
+                # 持有锁，因此这是以前中断的创建留下的暂存目录
+                if not self.info.resume:
+                    raise FileExistsError(
+                        f"存在未完成的创建：{stage}。使用 resume 继续，或删除该目录后重试")
+                try:
+                    with open(state_file, 'r', encoding='utf-8') as f:
+                        done = set(json.load(f)['done'])
+                except (OSError, ValueError, KeyError):
+                    done = set()
+                self._print(f"继续未完成的创建，复用已完成的步骤：{', '.join(sorted(done)) or '无'}")
+        except BaseException:
+            # 没有暂存目录时，状态文件是本次刚刚创建的
+            if locked and not os.path.isdir(stage):
+                os.unlink(state_file)
+            self._release_stage_lock()
+            raise
 
-1. 敏感信息（密码、密钥等）使用环境变量或本地配置
-2. 不同环境使用不同的配置文件
-3. 使用类型注解和验证确保配置正确性
-4. 将默认值定义在代码中，而不是配置文件中
-"""
+        self.project_dir = stage
+        self._stage_done = done
+        self._stage_lock = threading.Lock()
+        return done
+
+    def _release_stage_lock(self):
+        """关闭状态文件，释放 flock"""
+        fd, self._stage_fd = getattr(self, '_stage_fd', None), None
+        if fd is not None:
+            os.close(fd)
+
+    def _mark_step_done(self, name):
+        """记录已完成的步骤，供 resume 使用（写入持有锁的同一个状态文件）"""
+        data = json.dumps({'done': sorted(self._stage_done | {name})}).encode('utf-8')
+        with self._stage_lock:
+            self._stage_done.add(name)
+            os.ftruncate(self._stage_fd, 0)
+            os.pwrite(self._stage_fd, data, 0)
+
+    def _staged_steps(self, steps):
+        """包装步骤：跳过已完成的步骤、记录完成状态，并在最后发布
+
+        可复用的步骤只在成功完成工作时返回 True：因选项关闭而什么都没做，或失败后只记录了
+        警告（如Git初始化失败）的步骤不记录，以免 resume 时被跳过。步骤是并行执行的，
+        因此只看各自的返回值，而不看共享的警告列表。
+        """
+        def wrap(name, func):
+            def run():
+                if name in self._stage_done:
+                    return
+                if func() and name in self.RESUMABLE_STEPS:
+                    self._mark_step_done(name)
+            return run
+
+        staged = [(name, wrap(name, func), deps) for name, func, deps in steps]
+        staged.append(('publish', self.publish, [name for name, _, _ in steps]))
+        return staged
+
+    def publish(self):
+        """把暂存目录发布为最终的项目目录（create 的最后一步）
+
+        暂存目录与目标在同一文件系统时只需一次 rename；否则（如暂存在 tmpfs 上）
+        先复制到目标旁边的临时目录，再 rename。
+        """
+        stage, state_file = self._stage_paths()
+        venv_path = os.path.join(stage, '.venv')
+        if os.path.exists(os.path.join(venv_path, 'pyvenv.cfg')):
+            VenvCache().relocate(venv_path, venv_path, os.path.join(self.final_dir, '.venv'))
+
+        source = stage
+        if os.stat(stage).st_dev != os.stat(self.info.project_path).st_dev:
+            source = tempfile.mkdtemp(prefix=f'.{self.info.project_name}.publish.',
+                                      dir=self.info.project_path)
+            os.rmdir(source)
+            shutil.copytree(stage, source, symlinks=True)
+        try:
+            os.rename(source, self.final_dir)
+        except OSError:
+            if source != stage:
+                shutil.rmtree(source, ignore_errors=True)
+            raise FileExistsError(f"目标目录已存在且不为空：{self.final_dir}")
+
+        if source != stage:
+            shutil.rmtree(stage, ignore_errors=True)
+        if os.path.exists(state_file):
+            os.unlink(state_file)
+        self._release_stage_lock()
+        self.project_dir = self.final_dir
+
+    def _abort_stage(self):
+        """创建失败时清理暂存目录；resume 模式下保留以便继续"""
+        stage, state_file = self._stage_paths()
+        self.project_dir = self.final_dir
+        if self.info.resume:
+            self._release_stage_lock()
+            self._warn(f"创建失败，已保留暂存目录 {stage}，可使用 resume 继续")
+            return
+        shutil.rmtree(stage, ignore_errors=True)
+        if os.path.exists(state_file):
+            os.unlink(state_file)
+        self._release_stage_lock()
+
+    def _print_step_report(self, steps, wall_time):
+        """输出每个步骤的耗时和关键路径"""
+        self._print("\n步骤耗时：")
+        for name, _, _ in steps:
+            start, end = self.step_timings[name]
+            self._print(f"  {name:<14}{(end - start) * 1000:10.1f} ms")
+        total, path = critical_path(steps, self.step_timings)
+        self._print(f"  关键路径：{' -> '.join(path)}（{total * 1000:.1f} ms）")
+        self._print(f"  总耗时：{wall_time * 1000:.1f} ms")
 
-        # 写入帮助文档
-        helper_file = os.path.join(docs_dir, 'helper.md')
-        with open(helper_file, 'w', encoding='utf-8') as f:
-            f.write(helper_content)
+    def create(self):
+        """执行所有项目创建步骤"""
+        self._print(f"\n开始创建项目 '{self.info.project_name}'...")
+        steps = self.steps()
+        start = time.perf_counter()
+        if self.archive is not None:
+            self.step_timings = run_steps(steps)
+        else:
+            # 在暂存目录中创建，完成后一次 rename 发布，失败时不会留下半成品
+            self._begin_stage()
+            steps = self._staged_steps(steps)
+            try:
+                self.step_timings = run_steps(steps)
+            except BaseException:
+                self._abort_stage()
+                raise
+        self._print_step_report(steps, time.perf_counter() - start)
+        if self.archive is not None:
+            self._print(f"\n项目 '{self.info.project_name}' 已写入归档 {self.archive.path}")
+            return
+        self._print(f"\n项目 '{self.info.project_name}' 创建成功！")
+        self._print(f"位置：{self.project_dir}")
+        self._print("\n接下来你可以：")
+        self._print(f"1. cd {self.project_dir}")
+        if self.info.use_venv and self.info.wheelhouse:
+            self._print("2. source .venv/bin/activate  # 激活虚拟环境（依赖已安装）")
+        elif self.info.use_venv:
+            self._print("2. source .venv/bin/activate  # 激活虚拟环境")
+            self._print("3. pip install -r requirements.txt  # 安装依赖")
+        else:
+            self._print("2. python -m venv .venv  # 创建虚拟环境")
+            self._print("3. source .venv/bin/activate  # 激活虚拟环境")
+            self._print("4. pip install -r requirements.txt  # 安装依赖")
 
-    def create_project(self):
-        """创建项目目录结构"""
-        # 创建项目目录
-        self.project_dir = os.path.join(self.info.project_path, self.info.project_name)
-        src_dir = os.path.join(self.project_dir, 'src', self.info.project_name)
-        os.makedirs(src_dir, exist_ok=True)
-        
-        # 创建其他目录
-        os.makedirs(os.path.join(self.project_dir, 'tests'), exist_ok=True)
-        os.makedirs(os.path.join(self.project_dir, 'docs'), exist_ok=True)
-        
-        # 创建基础文件
-        self.create_basic_files()
-        
-        # 创建帮助文档
-        if self.info.use_logging or self.info.use_config:
-            self._create_helper_docs()
+def load_manifest(manifest_path):
+    """读取批量创建清单，支持 JSON Lines、JSON、CSV 和 YAML 格式
 
-    def init_git(self):
-        """初始化git仓库"""
-        if not self.info.use_git:
-            return
+    Returns:
+        list: 每个项目一条记录（字典）
+    """
+    ext = os.path.splitext(manifest_path)[1].lower()
+    with open(manifest_path, 'r', encoding='utf-8', newline='') as f:
+        if ext == '.csv':
+            # 空单元格视为未填写，使用默认值
+            return [{k: v for k, v in row.items() if v not in (None, '')}
+                    for row in csv.DictReader(f)]
+        if ext in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("读取YAML清单需要安装PyYAML")
+            records = yaml.safe_load(f) or []
+        elif ext == '.json':
+            records = json.load(f)
+        else:
+            records = [json.loads(line) for line in f if line.strip()]
+
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise ValueError("清单必须是项目记录（对象）的列表")
+    return records
+
+
+def _create_from_record(record, trace=False, archive=False):
+    """在工作进程中根据一条清单记录创建项目，返回结果报告
+
+    启用跟踪时，结果中附带本项目的跟踪事件，由主进程汇总。
+    输出到归档时只渲染，渲染结果随报告返回，由主进程写入归档。
+    """
+    if trace:
+        TRACER.enabled = True
+        TRACER.events = []
+    start = time.perf_counter()
+    result = {'project_name': record.get('project_name', ''), 'status': 'ok', 'error': ''}
+    try:
+        info = ProjectInfo.from_dict(record)
+        creator = ProjectCreator(info, quiet=True)
+        if archive:
+            creator.render()
+            result['files'] = creator.plan
+            result['directories'] = creator.plan_directories(creator.plan)
+        else:
+            result['project_dir'] = creator.project_dir
+            creator.create()
+            result['warnings'] = creator.warnings
+            result['steps'] = {name: end - start
+                               for name, (start, end) in creator.step_timings.items()}
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - start
+    if trace:
+        result['trace_events'] = TRACER.events
+    return result
+
+
+def run_batch(manifest_path, jobs=None, wheelhouse=None, trace=False, archive_path=None,
+              stage_dir=None, resume=False):
+    """按清单批量创建项目，使用进程池并行执行
+
+    Args:
+        manifest_path: 清单文件路径
+        jobs: 并行进程数
+        wheelhouse: 未在记录中指定时使用的本地 wheel 目录
+        trace: 是否收集各工作进程的跟踪事件（合并到 TRACER）
+        archive_path: 把所有项目写入同一个归档（'-' 表示标准输出），不生成目录
+        stage_dir: 未在记录中指定时使用的暂存目录位置
+        resume: 未在记录中指定时是否复用未完成创建中已完成的步骤
+
+    Returns:
+        list: 每个项目的结果报告
+    """
+    records = load_manifest(manifest_path)
+    defaults = {'wheelhouse': wheelhouse, 'stage_dir': stage_dir, 'resume': resume}
+    for record in records:
+        for key, value in defaults.items():
+            if value:
+                record.setdefault(key, value)
+    # 归档写到标准输出时，进度信息改为输出到标准错误
+    log = sys.stderr if archive_path == '-' else sys.stdout
+    print(f"共 {len(records)} 个项目，开始批量创建...", file=log)
+
+    start = time.perf_counter()
+    results = []
+    archive = ArchiveWriter(archive_path) if archive_path else None
+    worker = functools.partial(_create_from_record, trace=trace, archive=archive is not None)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for result in pool.map(worker, records):
+            TRACER.events.extend(result.pop('trace_events', []))
+            files = result.pop('files', None)
+            directories = result.pop('directories', None)
+            if files is not None:
+                archive.add_project(result['project_name'], directories, files)
+            results.append(result)
+            mark = '成功' if result['status'] == 'ok' else f"失败：{result['error']}"
+            if result.get('warnings'):
+                mark += f"（{len(result['warnings'])} 条警告）"
+            print(f"[{len(results)}/{len(records)}] {result['project_name']} "
+                  f"({result['seconds']:.2f}s) {mark}", file=log)
+    if archive is not None:
+        archive.close()
+    elapsed = time.perf_counter() - start
+
+    succeeded = sum(1 for r in results if r['status'] == 'ok')
+    print(f"\n完成：成功 {succeeded} 个，失败 {len(results) - succeeded} 个，"
+          f"总耗时 {elapsed:.2f}s，"
+          f"{len(results) / elapsed if elapsed else 0:.2f} 个项目/秒", file=log)
+    return results
+
+
+def default_socket_path():
+    """serve/client 默认使用的 Unix 套接字路径（每个用户一个）"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f'project_creater-{os.getuid()}.sock')
+
+
+class _ServeHandler(socketserver.StreamRequestHandler):
+    """处理一个客户端连接：每行一个 JSON 请求，按顺序每行返回一个 JSON 响应"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("请求必须是 JSON 对象")
+            except ValueError as e:
+                response = {'status': 'failed', 'error': f"无效的请求：{e}"}
+            else:
+                response = self.server.generator.handle(request)
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.wfile.flush()
 
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+@traced
+class GeneratorServer:
+    """常驻的项目生成服务
+
+    在一个进程中保持解释器版本缓存、已编译的模板和虚拟环境模板，通过本地 Unix 套接字
+    接收项目记录（与批量清单中的记录相同），创建项目后返回结果报告（与 batch 的 --report
+    相同）。每个连接可以连续发送多个请求，多个连接并发处理。
+
+    请求 {"command": "ping"} 返回服务状态。
+    """
+
+    def __init__(self, socket_path=None, wheelhouse=None, stage_dir=None):
+        self.socket_path = socket_path or default_socket_path()
+        # 未在请求中指定时使用的默认值
+        self.defaults = {'wheelhouse': wheelhouse, 'stage_dir': stage_dir}
+        self.started = time.time()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        """预先导入依赖、编译模板并准备虚拟环境模板，第一个请求也不必等待"""
+        for config_format in ProjectInfo.CONFIG_FORMATS:
+            info = ProjectInfo.from_dict({'project_name': 'warmup', 'use_venv': False,
+                                          'config_format': config_format})
+            ProjectCreator(info, quiet=True).render_plan()
         try:
-            subprocess.run(['git', 'init'], cwd=self.project_dir, check=True)
-            
-            # 创建 .gitignore
-            gitignore_content = '''# Python
-__pycache__/
-*.py[cod]
-*$py.class
-*.so
-.Python
-build/
-develop-eggs/
-dist/
-downloads/
-eggs/
-.eggs/
-lib/
-lib64/
-parts/
-sdist/
-var/
-wheels/
-*.egg-info/
-.installed.cfg
-*.egg
-
-# Virtual Environment
-.venv/
-venv/
-env/
-ENV/
-
-# IDE
-.idea/
-.vscode/
-*.swp
-*.swo
-
-# OS
-.DS_Store
-Thumbs.db
-'''
-            with open(os.path.join(self.project_dir, '.gitignore'), 'w') as f:
-                f.write(gitignore_content)
-
-            # 初始化git提交
-            subprocess.run(['git', 'add', '.'], cwd=self.project_dir, check=True)
-            subprocess.run(['git', 'commit', '-m', 'Initial commit'], cwd=self.project_dir, check=True)
-            print("Git仓库初始化成功！")
-        except subprocess.CalledProcessError:
-            print("警告：Git初始化失败。请确保已安装git。")
+            VenvCache(output=subprocess.DEVNULL).template(sys.executable)
         except Exception as e:
-            print(f"警告：Git初始化失败：{str(e)}")
-
-    def create_venv(self):
-        """创建虚拟环境"""
-        if not self.info.use_venv:
-            return
+            # 如缺少 ensurepip/python3-venv；不创建虚拟环境的请求仍然可以处理
+            print(f"警告：无法预先准备虚拟环境模板：{str(e)}", file=sys.stderr)
+
+    def handle(self, request):
+        """处理一个请求，返回响应字典"""
+        with self._lock:
+            self.requests += 1
+        if 'command' in request:
+            if request['command'] != 'ping':
+                return {'status': 'failed', 'error': f"未知命令：{request['command']!r}"}
+            return {'status': 'ok', 'pid': os.getpid(), 'requests': self.requests,
+                    'uptime': time.time() - self.started}
+
+        record = dict(request)
+        for key, value in self.defaults.items():
+            if value:
+                record.setdefault(key, value)
+        result = _create_from_record(record)
+        mark = '成功' if result['status'] == 'ok' else f"失败：{result['error']}"
+        print(f"{result['project_name']} ({result['seconds'] * 1000:.0f}ms) {mark}", flush=True)
+        return result
+
+    def serve_forever(self):
+        """监听套接字直到收到 SIGTERM 或 Ctrl-C"""
+        if os.path.exists(self.socket_path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                    probe.connect(self.socket_path)
+            except OSError:
+                # 上次异常退出留下的套接字文件
+                os.unlink(self.socket_path)
+            else:
+                raise RuntimeError(f"{self.socket_path} 上已有服务在运行")
 
+        # 只允许当前用户连接
+        old_umask = os.umask(0o177)
         try:
-            venv_path = os.path.join(self.project_dir, '.venv')
-            print(f"\n正在创建虚拟环境...")
-            subprocess.run([self.info.venv_python, '-m', 'venv', venv_path], check=True)
-            print("虚拟环境创建成功！")
-
-            # 在README中添加使用所选Python版本的说明
-            readme_path = os.path.join(self.project_dir, 'README.md')
-            with open(readme_path, 'r') as f:
-                content = f.read()
-            content = content.replace(
-                "python -m venv .venv",
-                f"{self.info.venv_python} -m venv .venv  # 使用 {self.info.venv_python}"
-            )
-            with open(readme_path, 'w') as f:
-                f.write(content)
+            server = _UnixServer(self.socket_path, _ServeHandler)
+        finally:
+            os.umask(old_umask)
+        server.generator = self
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            print(f"服务已启动：{self.socket_path}（pid {os.getpid()}）", flush=True)
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+            print("服务已停止")
 
-        except subprocess.CalledProcessError:
-            print("警告：虚拟环境创建失败")
-        except Exception as e:
-            print(f"警告：虚拟环境创建失败：{str(e)}")
 
-    def create(self):
-        """执行所有项目创建步骤"""
-        print(f"\n开始创建项目 '{self.info.project_name}'...")
-        self.create_project()
-        self.init_git()
-        self.create_venv()
-        print(f"\n项目 '{self.info.project_name}' 创建成功！")
-        print(f"位置：{self.project_dir}")
-        print("\n接下来你可以：")
-        print(f"1. cd {self.project_dir}")
-        if self.info.use_venv:
-            print("2. source .venv/bin/activate  # 激活虚拟环境")
-            print("3. pip install -r requirements.txt  # 安装依赖")
-        else:
-            print("2. python -m venv .venv  # 创建虚拟环境")
-            print("3. source .venv/bin/activate  # 激活虚拟环境")
-            print("4. pip install -r requirements.txt  # 安装依赖")
+# 请求中的路径字段：serve 进程的工作目录与客户端不同，发送前要转换为绝对路径
+CLIENT_PATH_FIELDS = ('project_path', 'stage_dir', 'wheelhouse', 'venv_python')
+
+
+def resolve_client_paths(record, cwd=None):
+    """把记录中的相对路径按客户端的工作目录转换为绝对路径，未指定项目位置时使用该目录
+
+    venv_python 只有包含目录分隔符时才视为路径，python3 这样的命令名保持不变。
+    """
+    cwd = cwd or os.getcwd()
+    record = dict(record)
+    if 'command' in record:
+        return record
+    if not record.get('project_path'):
+        record['project_path'] = cwd
+    for key in CLIENT_PATH_FIELDS:
+        value = record.get(key)
+        if not isinstance(value, str) or not value:
+            continue
+        if key == 'venv_python' and os.sep not in value and '/' not in value:
+            continue
+        record[key] = os.path.abspath(os.path.join(cwd, os.path.expanduser(value)))
+    return record
+
+
+def send_requests(requests, socket_path=None):
+    """把请求依次发送给 serve 进程，返回对应的响应列表"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path or default_socket_path())
+        sock.sendall(b''.join(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n'
+                              for request in requests))
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile('rb') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='create-project',
+                                     description='Python项目结构生成器')
+    parser.add_argument('--trace', metavar='OUT_JSON',
+                        help='记录各阶段耗时，写出 Chrome trace-event JSON 并打印汇总表')
+    parser.add_argument('--archive', metavar='PATH',
+                        help='交互模式下把项目写入 .tar.gz/.tar/.zip 归档，而不是生成目录')
+    parser.add_argument('--templates', metavar='DIR', action='append', default=[],
+                        help='用户模板目录，其中的同名 .tmpl 文件覆盖内置模板（可多次指定）')
+    parser.add_argument('--stage-dir', help='交互模式下暂存目录所在位置（如 /dev/shm）')
+    parser.add_argument('--resume', action='store_true',
+                        help='交互模式下复用上次未完成创建中已完成的步骤')
+    subparsers = parser.add_subparsers(dest='command')
+
+    batch_parser = subparsers.add_parser('batch', help='按清单文件批量创建项目（非交互）')
+    batch_parser.add_argument('manifest', help='清单文件（.jsonl/.json/.csv/.yaml）')
+    batch_parser.add_argument('-j', '--jobs', type=int, default=None,
+                              help='并行进程数（默认为CPU核数）')
+    batch_parser.add_argument('--report', help='将每个项目的结果报告写入该JSON文件')
+    batch_parser.add_argument('--wheelhouse',
+                              help='本地 wheel 目录，用于离线安装所有项目的依赖')
+    batch_parser.add_argument('--stage-dir',
+                              help='暂存目录所在位置（如 /dev/shm），默认与项目目录同级')
+    batch_parser.add_argument('--resume', action='store_true',
+                              help='复用上次未完成创建中已完成的步骤')
+    batch_parser.add_argument('--archive', metavar='PATH',
+                              help='把所有项目写入一个 .tar.gz/.tar/.zip 归档（- 表示标准输出），'
+                                   '不生成目录、Git仓库和虚拟环境')
+
+    serve_parser = subparsers.add_parser('serve', help='常驻进程，通过 Unix 套接字接收项目创建请求')
+    serve_parser.add_argument('--socket', help='套接字路径（默认在 $XDG_RUNTIME_DIR 或临时目录下）')
+    serve_parser.add_argument('--wheelhouse', help='请求中未指定时使用的本地 wheel 目录')
+    serve_parser.add_argument('--stage-dir', help='请求中未指定时使用的暂存目录位置')
+
+    client_parser = subparsers.add_parser('client', help='把清单中的项目交给 serve 进程创建')
+    client_parser.add_argument('manifest', help='清单文件（.jsonl/.json/.csv/.yaml）')
+    client_parser.add_argument('--socket', help='serve 进程的套接字路径')
+    client_parser.add_argument('--report', help='将每个项目的结果报告写入该JSON文件')
+
+    update_parser = subparsers.add_parser('update', help='按当前模板增量更新已生成的项目')
+    update_parser.add_argument('project_dirs', nargs='+', metavar='project_dir', help='项目目录')
+    update_parser.add_argument('--dry-run', action='store_true', help='只报告，不写入文件')
+    update_parser.add_argument('--info', metavar='RECORD',
+                               help='没有 .project_creater.json 的项目使用的生成参数'
+                                    '（JSON 对象，或按项目名对应的清单文件）')
+
+    args = parser.parse_args(argv)
+    TRACER.enabled = bool(args.trace)
+    if args.templates:
+        # 同时写入环境变量，批量模式的工作进程也使用这些模板
+        TEMPLATES.override_dirs = args.templates + TEMPLATES.override_dirs
+        os.environ[TEMPLATE_PATH_ENV] = os.pathsep.join(TEMPLATES.override_dirs)
+    try:
+        _run_command(args)
+    finally:
+        if args.trace:
+            # 归档写到标准输出时，跟踪信息与 run_batch 的进度一样输出到标准错误
+            log = sys.stderr if getattr(args, 'archive', None) == '-' else sys.stdout
+            TRACER.save(args.trace)
+            print(f"\n跟踪结果已写入 {args.trace}", file=log)
+            print(TRACER.summary(), file=log)
+
+
+def run_update(project_dir, dry_run=False, info=None):
+    """按项目清单中记录的参数增量更新已有项目
+
+    Args:
+        project_dir: 项目目录
+        dry_run: 只报告，不写入文件
+        info: 项目中没有清单（如本工具引入清单之前生成的项目）时使用的生成参数记录；
+            更新后会写入清单，之后的更新不再需要它
+
+    Returns:
+        dict: ProjectCreator.update 的结果报告
+    """
+    project_dir = os.path.abspath(project_dir)
+    manifest_path = os.path.join(project_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            record = json.load(f)['info']
+    elif info is not None:
+        record = dict(info)
+    else:
+        raise ValueError(f"{project_dir} 中没有 {MANIFEST_FILE}，不是由本工具生成的项目；"
+                         f"可以用 --info 提供生成参数")
+
+    record['project_path'] = os.path.dirname(project_dir)
+    info = ProjectInfo.from_dict(record)
+    creator = ProjectCreator(info)
+    creator.project_dir = project_dir
+
+    report = creator.update(dry_run=dry_run)
+    labels = {
+        'created': '新增', 'updated': '更新', 'kept': '保留（用户已修改）',
+        'conflict': '冲突（用户已修改，模板也有变化，未写入）', 'deleted': '跳过（用户已删除）',
+    }
+    for status, label in labels.items():
+        for path in report[status]:
+            print(f"{label}：{path}")
+    prefix = '（试运行，未写入）' if dry_run else ''
+    print(f"\n{prefix}更新 {len(report['updated'])} 个，新增 {len(report['created'])} 个，"
+          f"无变化 {len(report['unchanged'])} 个，冲突 {len(report['conflict'])} 个")
+    return report
+
+
+def load_update_info(path):
+    """读取 update --info 的生成参数：单个 JSON 对象，或任意清单格式的记录列表
+
+    Returns:
+        function: 项目目录 -> 记录（没有对应记录时为 None）。带 project_name 的记录
+        用于同名（目录名）的项目；不带 project_name 的记录用于其余所有项目，项目名取目录名
+    """
+    if os.path.splitext(path)[1].lower() == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        if isinstance(records, dict):
+            records = [records]
+        if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+            raise ValueError("生成参数必须是记录（对象）或记录的列表")
+    else:
+        records = load_manifest(path)
+    by_name = {r['project_name']: r for r in records if r.get('project_name')}
+    shared = [r for r in records if not r.get('project_name')]
+
+    def lookup(project_dir):
+        name = os.path.basename(os.path.abspath(project_dir))
+        if name in by_name:
+            return by_name[name]
+        if shared:
+            return dict(shared[0], project_name=name)
+        return None
+    return lookup
+
+
+def _run_command(args):
+    """执行命令行子命令"""
+    if args.command == 'update':
+        lookup = load_update_info(args.info) if args.info else (lambda project_dir: None)
+        conflicts = 0
+        failures = 0
+        for project_dir in args.project_dirs:
+            if len(args.project_dirs) > 1:
+                print(f"\n=== {project_dir} ===")
+            try:
+                report = run_update(project_dir, dry_run=args.dry_run, info=lookup(project_dir))
+            except (ValueError, OSError) as e:
+                print(f"错误：{e}", file=sys.stderr)
+                failures += 1
+                continue
+            conflicts += len(report['conflict'])
+        if failures:
+            raise SystemExit(f"{failures} 个项目更新失败")
+        if conflicts:
+            sys.exit(1)
+        return
+
+    if args.command == 'serve':
+        server = GeneratorServer(args.socket, wheelhouse=args.wheelhouse, stage_dir=args.stage_dir)
+        server.warm_up()
+        server.serve_forever()
+        return
+
+    if args.command == 'client':
+        try:
+            records = [resolve_client_paths(record) for record in load_manifest(args.manifest)]
+            results = send_requests(records, args.socket)
+        except OSError as e:
+            raise SystemExit(f"无法连接 serve 进程：{e}")
+        for result in results:
+            mark = '成功' if result['status'] == 'ok' else f"失败：{result['error']}"
+            print(f"{result.get('project_name', '')} ({result.get('seconds', 0):.2f}s) {mark}")
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+        if any(r['status'] != 'ok' for r in results):
+            sys.exit(1)
+        return
+
+    if args.command == 'batch':
+        with TRACER.span('batch', cat='command'):
+            results = run_batch(args.manifest, jobs=args.jobs, wheelhouse=args.wheelhouse,
+                                trace=TRACER.enabled, archive_path=args.archive,
+                                stage_dir=args.stage_dir, resume=args.resume)
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+        if any(r['status'] != 'ok' for r in results):
+            sys.exit(1)
+        return
+
+    if args.archive == '-':
+        raise SystemExit("交互模式下不能把归档写到标准输出")
 
-def main():
     # 收集项目信息
     project_info = ProjectInfo()
+    project_info.stage_dir = args.stage_dir or ""
+    project_info.resume = args.resume
     project_info.collect_info()
     
     # 创建项目
+    if args.archive:
+        with ArchiveWriter(args.archive) as archive:
+            ProjectCreator(project_info, archive=archive).create()
+        return
     creator = ProjectCreator(project_info)
     creator.create()
 
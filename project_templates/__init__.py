@@ -0,0 +1 @@
+"""项目生成器的内置模板（由 main.TemplateRegistry 按需加载）"""
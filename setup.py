@@ -10,6 +10,9 @@ setup(
     name="project_creater",
     version="1.0.1",
     packages=find_packages(),
+    py_modules=['main'],
+    # 内置模板随包分发，由 importlib.resources 读取
+    package_data={'project_templates': ['*/*.tmpl']},
     install_requires=read_requirements('requirements.txt'),
     entry_points={
         'console_scripts': [
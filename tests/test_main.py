@@ -0,0 +1,208 @@
+"""Tests for the project generator command line."""
+import io
+import os
+import sys
+import gzip
+import json
+import time
+import shutil
+import socket
+import tarfile
+import tempfile
+import unittest
+import threading
+import subprocess
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, 'main.py')
+sys.path.insert(0, ROOT)
+
+import main  # noqa: E402
+
+
+class TestArchiveToStdout(unittest.TestCase):
+    """batch --archive - writes nothing but the archive to stdout."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_trace_output_does_not_corrupt_archive(self):
+        manifest = os.path.join(self.tmp, 'm.jsonl')
+        with open(manifest, 'w', encoding='utf-8') as f:
+            for name in ('alpha', 'beta'):
+                f.write(json.dumps({'project_name': name, 'use_venv': False,
+                                    'use_git': False}) + '\n')
+        trace = os.path.join(self.tmp, 't.json')
+        result = subprocess.run(
+            [sys.executable, MAIN, '--trace', trace, 'batch', manifest, '--archive', '-'],
+            cwd=self.tmp, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+
+        # Strict: trailing bytes after the gzip stream raise here
+        gzip.decompress(result.stdout)
+        with tarfile.open(fileobj=io.BytesIO(result.stdout), mode='r:gz') as archive:
+            names = archive.getnames()
+        self.assertIn('alpha/README.md', names)
+        self.assertIn('beta/README.md', names)
+        self.assertIn('跟踪结果已写入'.encode('utf-8'), result.stderr)
+        self.assertTrue(os.path.exists(trace))
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'requires Unix sockets')
+class TestServeClient(unittest.TestCase):
+    """client resolves paths in its own cwd, not in the serve process's cwd."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.server_dir = os.path.join(self.tmp, 'srv')
+        self.client_dir = os.path.join(self.tmp, 'cli')
+        os.mkdir(self.server_dir)
+        os.mkdir(self.client_dir)
+        self.socket_path = os.path.join(self.tmp, 'serve.sock')
+        # Keep the venv template and other caches out of the real ~/.cache
+        self.env = dict(os.environ, XDG_CACHE_HOME=os.path.join(self.tmp, 'cache'))
+        self.server = subprocess.Popen(
+            [sys.executable, MAIN, 'serve', '--socket', self.socket_path],
+            cwd=self.server_dir, env=self.env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 120
+        while not self._ping():
+            if self.server.poll() is not None or time.monotonic() > deadline:
+                self.fail('serve did not start')
+            time.sleep(0.1)
+
+    def tearDown(self):
+        self.server.terminate()
+        self.server.wait()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _ping(self):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(self.socket_path)
+                sock.sendall(b'{"command": "ping"}\n')
+                sock.shutdown(socket.SHUT_WR)
+                return b'"ok"' in sock.makefile('rb').read()
+        except OSError:
+            return False
+
+    def _client(self, records):
+        manifest = os.path.join(self.client_dir, 'm.jsonl')
+        with open(manifest, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        subprocess.run([sys.executable, MAIN, 'client', 'm.jsonl', '--socket', self.socket_path],
+                       cwd=self.client_dir, env=self.env, check=True,
+                       stdout=subprocess.DEVNULL)
+
+    def test_paths_resolve_in_client_cwd(self):
+        self._client([
+            {'project_name': 'relative', 'project_path': 'relout',
+             'use_venv': False, 'use_git': False},
+            {'project_name': 'default', 'use_venv': False, 'use_git': False},
+        ])
+        self.assertTrue(os.path.isdir(os.path.join(self.client_dir, 'relout', 'relative')))
+        self.assertTrue(os.path.isdir(os.path.join(self.client_dir, 'default')))
+        self.assertEqual(os.listdir(self.server_dir), [])
+
+
+class TestStagedCreate(unittest.TestCase):
+    """Stage locking and per-step resume bookkeeping."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        env = mock.patch.dict(os.environ, GIT_AUTHOR_NAME='t', GIT_AUTHOR_EMAIL='t@t',
+                              GIT_COMMITTER_NAME='t', GIT_COMMITTER_EMAIL='t@t')
+        env.start()
+        self.addCleanup(env.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _creator(self, **fields):
+        record = dict(project_name='p', project_path=self.tmp, use_venv=False,
+                      use_git=False, resume=True)
+        record.update(fields)
+        return main.ProjectCreator(main.ProjectInfo.from_dict(record), quiet=True)
+
+    @unittest.skipIf(main.fcntl is None, 'requires fcntl')
+    def test_running_stage_is_not_resumed(self):
+        first = self._creator()
+        first._begin_stage()
+        try:
+            with self.assertRaisesRegex(FileExistsError, '另一个进程正在创建'):
+                self._creator()._begin_stage()
+        finally:
+            first._abort_stage()
+        # An interrupted stage, once unlocked, can be resumed
+        second = self._creator()
+        second._begin_stage()
+        second._abort_stage()
+
+    def test_other_step_warning_does_not_discard_git(self):
+        creator = self._creator(use_git=True, use_venv=True)
+        started, warned = threading.Event(), threading.Event()
+        init_git = creator.init_git
+
+        def slow_init_git():
+            started.set()
+            warned.wait(10)
+            return init_git()
+
+        def failing_venv():
+            # Warn while the git step is running
+            started.wait(10)
+            creator._warn('venv failed')
+            warned.set()
+
+        def failing_commit():
+            raise RuntimeError('commit failed')
+
+        creator.init_git = slow_init_git
+        creator.create_venv = failing_venv
+        creator.commit_git = failing_commit
+        with self.assertRaises(RuntimeError):
+            creator.create()
+
+        with open(os.path.join(self.tmp, '.p.partial.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['done'], ['git'])
+
+
+class TestPythonCache(unittest.TestCase):
+    """Interpreter discovery keeps cache entries it did not find itself."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        patch = mock.patch.multiple(main, CACHE_DIR=self.tmp,
+                                    PYTHON_CACHE_FILE=os.path.join(self.tmp, 'pythons.json'))
+        patch.start()
+        self.addCleanup(patch.stop)
+        main._PYTHON_VERSIONS.clear()
+        self.addCleanup(main._PYTHON_VERSIONS.clear)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_discovery_keeps_other_interpreters(self):
+        python = os.path.join(self.tmp, 'python')
+        with open(python, 'w', encoding='utf-8') as f:
+            f.write('#!/bin/sh\necho Python 3.99.0\n')
+        os.chmod(python, 0o755)
+        self.assertEqual(main._python_version(python), 'Python 3.99.0')
+
+        cache = main._load_python_cache()
+        gone = os.path.join(self.tmp, 'gone')
+        cache[gone] = {'key': [0, 0, 0, 0], 'version': 'Python 3.0.0'}
+        main._save_python_cache(cache)
+
+        main.ProjectInfo().get_installed_pythons()
+        cache = main._load_python_cache()
+        self.assertIn(os.path.realpath(python), cache)
+        self.assertNotIn(gone, cache)
+
+
+if __name__ == '__main__':
+    unittest.main()